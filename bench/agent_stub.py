@@ -0,0 +1,95 @@
+import asyncio
+import os
+import subprocess
+import time
+import uuid
+
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ResultMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+from typing import AsyncIterator
+
+
+class ScriptedAgent:
+    """Replacement for claude_agent_sdk.query that edits the workspace on a script
+
+    Each turn waits `turn_seconds` (the model thinking), writes one file of
+    the feature and reports it as a Write tool call. The last turn commits
+    and pushes like the real agent does, so the preview sees the change.
+    """
+
+    def __init__(self, turns: int = 5, turn_seconds: float = 1.0, file_bytes: int = 4096):
+        self.turns = turns
+        self.turn_seconds = turn_seconds
+        self.file_bytes = file_bytes
+
+    async def query(
+        self, prompt: str, options: ClaudeAgentOptions | None = None
+    ) -> AsyncIterator[AssistantMessage | UserMessage | ResultMessage]:
+        start = time.time()
+        cwd = str(options.cwd) if options and options.cwd else os.getcwd()
+        session_id = uuid.uuid4().hex
+        feature = f"feature_{session_id[:8]}"
+
+        for turn in range(self.turns):
+            await asyncio.sleep(self.turn_seconds)
+            path = os.path.join("app", feature, f"part_{turn}.tsx")
+            content = f"// {prompt[:60]}\n" + "x" * self.file_bytes + "\n"
+            tool_use = ToolUseBlock(
+                id=f"toolu_{uuid.uuid4().hex[:12]}",
+                name="Write",
+                input={"file_path": path, "content": content},
+            )
+            yield AssistantMessage(
+                content=[TextBlock(text=f"Writing {path}"), tool_use],
+                model="scripted",
+            )
+            await asyncio.to_thread(self._write, cwd, path, content)
+            yield UserMessage(
+                content=[ToolResultBlock(tool_use_id=tool_use.id, content=f"Wrote {path}")]
+            )
+
+        commit = ToolUseBlock(
+            id=f"toolu_{uuid.uuid4().hex[:12]}",
+            name="Bash",
+            input={"command": "git add -A && git commit -m ... && git push"},
+        )
+        yield AssistantMessage(content=[commit], model="scripted")
+        output = await asyncio.to_thread(self._commit, cwd, feature)
+        yield UserMessage(content=[ToolResultBlock(tool_use_id=commit.id, content=output)])
+
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=int((time.time() - start) * 1000),
+            duration_api_ms=int(self.turns * self.turn_seconds * 1000),
+            is_error=False,
+            num_turns=self.turns + 1,
+            session_id=session_id,
+            total_cost_usd=0.0,
+        )
+
+    @staticmethod
+    def _write(cwd: str, path: str, content: str):
+        full_path = os.path.join(cwd, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+
+    @staticmethod
+    def _commit(cwd: str, feature: str) -> str:
+        outputs = []
+        for command in (
+            ["git", "add", "-A"],
+            ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost",
+             "commit", "-q", "-m", f"Add {feature}"],
+            ["git", "push", "-q", "origin", "HEAD:main"],
+        ):
+            result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+            outputs.append(result.stdout + result.stderr)
+        return "".join(outputs)
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import time
+
+from cc_vibecode.git import CustomGitAPI
+from cc_vibecode.metrics import span
+from typing import Any, Dict
+
+
+def make_template(path: str, packages: int = 50):
+    """Create a small Next.js-shaped template repository on branch main"""
+    if os.path.isdir(os.path.join(path, ".git")):
+        return
+    os.makedirs(os.path.join(path, "app"), exist_ok=True)
+    os.makedirs(os.path.join(path, "prisma"), exist_ok=True)
+    package = {
+        "name": "bench-app",
+        "private": True,
+        "scripts": {"dev": "next dev", "build": "next build"},
+        "dependencies": {f"pkg-{i}": "1.0.0" for i in range(packages)},
+    }
+    with open(os.path.join(path, "package.json"), "w") as f:
+        json.dump(package, f, indent=2)
+    with open(os.path.join(path, "package-lock.json"), "w") as f:
+        json.dump({"name": "bench-app", "lockfileVersion": 3, "packages": package["dependencies"]}, f)
+    with open(os.path.join(path, "app", "page.tsx"), "w") as f:
+        f.write("export default function Page() { return <main>bench</main>; }\n")
+    with open(os.path.join(path, "prisma", "schema.prisma"), "w") as f:
+        f.write('datasource db {\n  provider = "postgresql"\n  url = env("DATABASE_URL")\n}\n')
+    with open(os.path.join(path, ".gitignore"), "w") as f:
+        f.write("node_modules\n.env\n.dev-server.*\n")
+    for command in (
+        ["git", "init", "-q", "-b", "main"],
+        ["git", "add", "-A"],
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost",
+         "commit", "-q", "-m", "Template"],
+    ):
+        subprocess.run(command, cwd=path, check=True)
+
+
+class LocalGitHub(CustomGitAPI):
+    """CustomGitAPI whose "GitHub" is a directory of bare repositories
+
+    Repository URLs are paths to bare repos. A missing one is created from
+    the template after `create_seconds`, like GitHub's template copy. An
+    empty one (create_github_repo) takes `api_seconds`, a single API call.
+    """
+
+    def __init__(
+        self, template: str, create_seconds: float = 1.0, api_seconds: float = 0.3, **kwargs
+    ):
+        super().__init__("", **kwargs)
+        self.template = template
+        self.create_seconds = create_seconds
+        self.api_seconds = api_seconds
+
+    @span("git.ensure_repo")
+    def ensure_github_repo(self, repo_url: str, *args, **kwargs) -> Dict[str, Any]:
+        if os.path.isdir(repo_url):
+            return {"success": True, "exists": True, "created": False, "message": "exists"}
+        time.sleep(self.create_seconds)
+        result = self.run_git_command(["git", "clone", "-q", "--bare", self.template, repo_url])
+        return {
+            "success": result["success"],
+            "exists": result["success"],
+            "created": result["success"],
+            "message": result["stderr"] or f"Created {repo_url}",
+        }
+
+    @span("git.create_repo")
+    def create_github_repo(self, repo_url: str) -> Dict[str, Any]:
+        if os.path.isdir(repo_url):
+            return {"success": True, "created": False, "message": "exists"}
+        time.sleep(self.api_seconds)
+        result = self.run_git_command(["git", "init", "-q", "--bare", "-b", "main", repo_url])
+        return {
+            "success": result["success"],
+            "created": result["success"],
+            "message": result["stderr"] or f"Created {repo_url}",
+        }
@@ -0,0 +1,422 @@
+import json
+import random
+import threading
+import time
+import uuid
+
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+class NeonStub:
+    """In-memory stand-in for the parts of the Neon API the orchestrator uses
+
+    Every request sleeps `latency` seconds. Branch and endpoint creations
+    return operations that stay running for `op_seconds`, during which the
+    branch is "init" and the endpoint is not yet active. `lock_rate` is the
+    chance a branch creation answers 423 "project locked", to exercise the
+    retry path.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        op_seconds: float = 1.0,
+        lock_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.op_seconds = op_seconds
+        self.lock_rate = lock_rate
+        self.projects: dict[str, dict[str, Any]] = {}
+        self.branches: dict[str, dict[str, Any]] = {}
+        self.endpoints: dict[str, dict[str, Any]] = {}
+        self.operations: dict[str, dict[str, Any]] = {}
+        self.roles: dict[tuple[str, str], dict[str, Any]] = {}
+        self.requests = 0
+        self._ready_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v2"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # State
+
+    def _project(self, name: str, branch_name: str = "main") -> dict[str, Any]:
+        project_id = _id("proj")
+        now = _now()
+        project = {
+            "id": project_id,
+            "platform_id": "aws",
+            "region_id": "aws-us-east-2",
+            "name": name,
+            "provisioner": "k8s-neonvm",
+            "pg_version": 17,
+            "proxy_host": "localhost",
+            "branch_logical_size_limit": 0,
+            "branch_logical_size_limit_bytes": 0,
+            "store_passwords": True,
+            "active_time": 0,
+            "active_time_seconds": 0,
+            "cpu_used_sec": 0,
+            "data_storage_bytes_hour": 0,
+            "data_transfer_bytes": 0,
+            "written_data_bytes": 0,
+            "compute_time_seconds": 0,
+            "creation_source": "bench",
+            "history_retention_seconds": 0,
+            "consumption_period_start": now,
+            "consumption_period_end": now,
+            "created_at": now,
+            "updated_at": now,
+            "owner_id": "bench",
+        }
+        self.projects[project_id] = project
+        branch = self._branch(project_id, branch_name, default=True, ready=True)
+        self.roles[(branch["id"], "neondb_owner")] = self._role(branch["id"], "neondb_owner")
+        return project
+
+    def _branch(
+        self,
+        project_id: str,
+        name: str,
+        default: bool = False,
+        ready: bool = False,
+        parent_id: str | None = None,
+    ):
+        now = _now()
+        branch = {
+            "id": _id("br"),
+            "project_id": project_id,
+            "parent_id": parent_id,
+            "name": name,
+            "current_state": "ready",
+            "state_changed_at": now,
+            "creation_source": "bench",
+            "default": default,
+            "protected": False,
+            "cpu_used_sec": 0,
+            "compute_time_seconds": 0,
+            "active_time_seconds": 0,
+            "written_data_bytes": 0,
+            "data_transfer_bytes": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.branches[branch["id"]] = branch
+        if not ready:
+            self._ready_at[branch["id"]] = time.time() + self.op_seconds
+        return branch
+
+    def _role(self, branch_id: str, name: str) -> dict[str, Any]:
+        now = _now()
+        return {
+            "branch_id": branch_id,
+            "name": name,
+            "password": uuid.uuid4().hex,
+            "protected": name.endswith("_owner"),
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    def _operation(self, project_id: str, action: str, **refs: str) -> dict[str, Any]:
+        now = _now()
+        operation = {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "action": action,
+            "status": "running",
+            "failures_count": 0,
+            "created_at": now,
+            "updated_at": now,
+            "total_duration_ms": 0,
+            **refs,
+        }
+        self.operations[operation["id"]] = operation
+        self._ready_at[operation["id"]] = time.time() + self.op_seconds
+        return operation
+
+    def _settled(self, resource_id: str) -> bool:
+        return time.time() >= self._ready_at.get(resource_id, 0)
+
+    def _view_branch(self, branch: dict[str, Any]) -> dict[str, Any]:
+        return {**branch, "current_state": "ready" if self._settled(branch["id"]) else "init"}
+
+    def _view_endpoint(self, endpoint: dict[str, Any]) -> dict[str, Any]:
+        return {**endpoint, "current_state": "active" if self._settled(endpoint["id"]) else "init"}
+
+    def _view_operation(self, operation: dict[str, Any]) -> dict[str, Any]:
+        if self._settled(operation["id"]):
+            return {**operation, "status": "finished"}
+        return operation
+
+    def create_role_over_sql(self, host: str, role_name: str):
+        """What CREATE ROLE on an endpoint does, the role shows up in the API"""
+        with self._lock:
+            endpoint = next(e for e in self.endpoints.values() if e["host"] == host)
+            self.roles[(endpoint["branch_id"], role_name)] = self._role(endpoint["branch_id"], role_name)
+
+    # Routes
+
+    def handle(self, method: str, path: str, body: dict[str, Any]) -> tuple[int, Any]:
+        parts = [part for part in path.split("?")[0].split("/") if part][2:]  # drop api/v2
+        # Ids sit at odd positions: projects/{}/branches/{}/roles/{}/reset_password
+        route = "/".join(part if index % 2 == 0 else "{}" for index, part in enumerate(parts))
+        args = parts[1::2]
+        with self._lock:
+            self.requests += 1
+            handler = self.ROUTES.get((method, route))
+            if handler is None:
+                return 404, {"message": f"No stub for {method} {path}"}
+            return handler(self, body, *args)
+
+    def list_projects(self, body):
+        keys = [
+            "id", "platform_id", "region_id", "name", "provisioner", "pg_version",
+            "proxy_host", "branch_logical_size_limit", "branch_logical_size_limit_bytes",
+            "store_passwords", "active_time", "cpu_used_sec", "creation_source",
+            "created_at", "updated_at", "owner_id",
+        ]
+        projects = [{k: p[k] for k in keys} for p in self.projects.values()]
+        return 200, {"projects": projects}
+
+    def create_project(self, body):
+        spec = body.get("project", {})
+        project = self._project(
+            spec.get("name", "bench"), spec.get("branch", {}).get("name", "main")
+        )
+        return 201, {"project": project}
+
+    def get_project(self, body, project_id):
+        if project_id not in self.projects:
+            return 404, {"message": "project not found"}
+        return 200, {"project": self.projects[project_id]}
+
+    def list_branches(self, body, project_id):
+        branches = [
+            self._view_branch(b) for b in self.branches.values() if b["project_id"] == project_id
+        ]
+        return 200, {"branches": branches}
+
+    def create_branch(self, body, project_id):
+        if self.lock_rate and random.random() < self.lock_rate:
+            return 423, {"message": "project already has running operations"}
+        name = body.get("branch", {}).get("name") or _id("branch")
+        parent_id = body.get("branch", {}).get("parent_id") or next(
+            (b["id"] for b in self.branches.values() if b["project_id"] == project_id and b["default"]),
+            None,
+        )
+        branch = self._branch(project_id, name, parent_id=parent_id)
+        operation = self._operation(project_id, "create_branch", branch_id=branch["id"])
+        for (branch_id, role_name), role in list(self.roles.items()):
+            parent = self.branches.get(branch_id)
+            if parent and parent["project_id"] == project_id and parent["default"]:
+                self.roles[(branch["id"], role_name)] = {**role, "branch_id": branch["id"]}
+        self._ready_at[branch["id"]] = self._ready_at[operation["id"]]
+        return 201, {"branch": self._view_branch(branch), "operations": [operation]}
+
+    def get_branch(self, body, project_id, branch_id):
+        if branch_id not in self.branches:
+            return 404, {"message": "branch not found"}
+        return 200, {"branch": self._view_branch(self.branches[branch_id])}
+
+    def update_branch(self, body, project_id, branch_id):
+        if branch_id not in self.branches:
+            return 404, {"message": "branch not found"}
+        branch = self.branches[branch_id]
+        branch.update(body.get("branch", {}), updated_at=_now())
+        return 200, {"branch": self._view_branch(branch), "operations": []}
+
+    def delete_branch(self, body, project_id, branch_id):
+        if branch_id not in self.branches:
+            return 404, {"message": "branch not found"}
+        # Like Neon, children have to go first
+        if any(b["parent_id"] == branch_id for b in self.branches.values()):
+            return 422, {"message": "branch has children"}
+        branch = self.branches.pop(branch_id)
+        for key in [key for key in self.roles if key[0] == branch_id]:
+            del self.roles[key]
+        return 200, {"branch": self._view_branch(branch), "operations": []}
+
+    def set_default(self, body, project_id, branch_id):
+        if branch_id not in self.branches:
+            return 404, {"message": "branch not found"}
+        for branch in self.branches.values():
+            if branch["project_id"] == project_id:
+                branch["default"] = branch["id"] == branch_id
+        return 200, {"branch": self._view_branch(self.branches[branch_id]), "operations": []}
+
+    def restore_branch(self, body, project_id, branch_id):
+        target = self.branches.get(branch_id)
+        if target is None or body.get("source_branch_id") not in self.branches:
+            return 404, {"message": "branch not found"}
+        children = [b for b in self.branches.values() if b["parent_id"] == branch_id]
+        backup_name = body.get("preserve_under_name")
+        if children and not backup_name:
+            return 400, {"message": "preserve_under_name is required for a branch with children"}
+        if backup_name:
+            # The old state, which inherits the children
+            backup = self._branch(project_id, backup_name, ready=True, parent_id=target["parent_id"])
+            for (role_branch_id, role_name), role in list(self.roles.items()):
+                if role_branch_id == branch_id:
+                    self.roles[(backup["id"], role_name)] = {**role, "branch_id": backup["id"]}
+            for child in children:
+                child["parent_id"] = backup["id"]
+        target["updated_at"] = _now()
+        operation = self._operation(project_id, "create_timeline", branch_id=branch_id)
+        return 200, {"branch": self._view_branch(target), "operations": [operation]}
+
+    def list_databases(self, body, project_id, branch_id):
+        now = _now()
+        database = {
+            "id": 1,
+            "branch_id": branch_id,
+            "name": "neondb",
+            "owner_name": "neondb_owner",
+            "created_at": now,
+            "updated_at": now,
+        }
+        return 200, {"databases": [database]}
+
+    def list_roles(self, body, project_id, branch_id):
+        roles = [role for (b, _), role in self.roles.items() if b == branch_id]
+        return 200, {"roles": roles}
+
+    def create_role(self, body, project_id, branch_id):
+        name = body["role"]["name"]
+        role = self._role(branch_id, name)
+        self.roles[(branch_id, name)] = role
+        return 201, {"role": role, "operations": []}
+
+    def delete_role(self, body, project_id, branch_id, role_name):
+        role = self.roles.pop((branch_id, role_name), None)
+        if role is None:
+            return 404, {"message": "role not found"}
+        return 200, {"role": role, "operations": []}
+
+    def reset_password(self, body, project_id, branch_id, role_name):
+        role = self.roles.get((branch_id, role_name))
+        if role is None:
+            return 404, {"message": "role not found"}
+        role["password"] = uuid.uuid4().hex
+        return 200, {"role": role, "operations": []}
+
+    def create_endpoint(self, body, project_id):
+        spec = body.get("endpoint", {})
+        now = _now()
+        endpoint_id = _id("ep")
+        endpoint = {
+            "id": endpoint_id,
+            # Never resolves, so SQL against the stub fails fast
+            "host": f"{endpoint_id}.invalid",
+            "project_id": project_id,
+            "branch_id": spec["branch_id"],
+            "autoscaling_limit_min_cu": 0.25,
+            "autoscaling_limit_max_cu": 0.25,
+            "region_id": "aws-us-east-2",
+            "type": spec.get("type", "read_write"),
+            "current_state": "init",
+            "settings": {},
+            "pooler_enabled": False,
+            "pooler_mode": "transaction",
+            "disabled": False,
+            "passwordless_access": False,
+            "creation_source": "bench",
+            "created_at": now,
+            "updated_at": now,
+            "proxy_host": "localhost",
+            "suspend_timeout_seconds": 0,
+            "provisioner": "k8s-neonvm",
+        }
+        self.endpoints[endpoint_id] = endpoint
+        operation = self._operation(project_id, "start_compute", endpoint_id=endpoint_id)
+        self._ready_at[endpoint_id] = self._ready_at[operation["id"]]
+        return 201, {"endpoint": self._view_endpoint(endpoint), "operations": [operation]}
+
+    def get_endpoint(self, body, project_id, endpoint_id):
+        if endpoint_id not in self.endpoints:
+            return 404, {"message": "endpoint not found"}
+        return 200, {"endpoint": self._view_endpoint(self.endpoints[endpoint_id])}
+
+    def delete_endpoint(self, body, project_id, endpoint_id):
+        endpoint = self.endpoints.pop(endpoint_id, None)
+        if endpoint is None:
+            return 404, {"message": "endpoint not found"}
+        return 200, {"endpoint": self._view_endpoint(endpoint), "operations": []}
+
+    def get_operation(self, body, project_id, operation_id):
+        if operation_id not in self.operations:
+            return 404, {"message": "operation not found"}
+        return 200, {"operation": self._view_operation(self.operations[operation_id])}
+
+    ROUTES = {
+        ("GET", "projects"): list_projects,
+        ("POST", "projects"): create_project,
+        ("GET", "projects/{}"): get_project,
+        ("GET", "projects/{}/branches"): list_branches,
+        ("POST", "projects/{}/branches"): create_branch,
+        ("GET", "projects/{}/branches/{}"): get_branch,
+        ("PATCH", "projects/{}/branches/{}"): update_branch,
+        ("DELETE", "projects/{}/branches/{}"): delete_branch,
+        ("POST", "projects/{}/branches/{}/set_as_default"): set_default,
+        ("POST", "projects/{}/branches/{}/restore"): restore_branch,
+        ("GET", "projects/{}/branches/{}/databases"): list_databases,
+        ("GET", "projects/{}/branches/{}/roles"): list_roles,
+        ("POST", "projects/{}/branches/{}/roles"): create_role,
+        ("DELETE", "projects/{}/branches/{}/roles/{}"): delete_role,
+        ("POST", "projects/{}/branches/{}/roles/{}/reset_password"): reset_password,
+        ("POST", "projects/{}/endpoints"): create_endpoint,
+        ("GET", "projects/{}/endpoints/{}"): get_endpoint,
+        ("DELETE", "projects/{}/endpoints/{}"): delete_endpoint,
+        ("GET", "projects/{}/operations/{}"): get_operation,
+    }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else {}
+                time.sleep(stub.latency)
+                status, payload = stub.handle(self.command, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,262 @@
+"""End-to-end benchmark of execute() against local stand-ins
+
+GitHub is a directory of bare repositories, Neon is bench.neon_stub, the
+agent is bench.agent_stub and npm is bench/bin/npm. Nothing leaves the
+machine. Run from the repository root:
+
+    uv run python -m bench.run --concurrency 1,2,4,8
+
+For each concurrency level, that many workers each build their own
+project `--rounds` times. The first round creates the repository and the
+workspace; later rounds hit the warm paths. The report lists p50/p95/p99
+per span and the jobs per minute.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from collections import defaultdict
+from typing import Any
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma separated levels")
+    parser.add_argument("--rounds", type=int, default=2, help="Jobs per worker per level")
+    parser.add_argument("--workdir", help="Keep state here instead of a temp dir")
+    parser.add_argument("--neon-latency", type=float, default=0.05, help="Seconds per Neon API call")
+    parser.add_argument("--neon-op-seconds", type=float, default=1.0, help="Seconds Neon operations run")
+    parser.add_argument("--neon-lock-rate", type=float, default=0.0, help="Chance of a 423 on branch create")
+    parser.add_argument("--neon-pool", type=int, default=0, help="NEON_POOL_SIZE")
+    parser.add_argument("--github-create-seconds", type=float, default=1.0)
+    parser.add_argument("--think-seconds", type=float, default=0.0, help="Idle time between a worker's jobs")
+    parser.add_argument("--agent-turns", type=int, default=5)
+    parser.add_argument("--agent-turn-seconds", type=float, default=1.0)
+    parser.add_argument("--npm-install-seconds", type=float, default=2.0)
+    parser.add_argument("--server-start-seconds", type=float, default=1.0)
+    parser.add_argument("--no-npm-cache", action="store_true", help="Set NPM_CACHE=0")
+    parser.add_argument("--no-context", action="store_true", help="Set AGENT_CONTEXT=0")
+    parser.add_argument("--local-template", action="store_true", help="Set TEMPLATE_LOCAL=1")
+    parser.add_argument("--reap", action="store_true", help="Sweep leftover branches at the end, dry run first")
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def configure_env(args: argparse.Namespace, workdir: str, neon_url: str):
+    """Point every setting main.py reads at import time to the stand-ins"""
+    os.environ.update(
+        {
+            "GITHUB_TOKEN": "",
+            "NEON_API_KEY": "bench",
+            "NEON_API_URL": neon_url,
+            "NEON_POOL_SIZE": str(args.neon_pool),
+            "WORKSPACE_ROOT": os.path.join(workdir, "workspaces"),
+            "GIT_MIRROR_ROOT": os.path.join(workdir, "mirrors"),
+            "NPM_CACHE": "0" if args.no_npm_cache else "1",
+            "NPM_CACHE_ROOT": os.path.join(workdir, "cache", "node_modules"),
+            "AGENT_CONTEXT": "0" if args.no_context else "1",
+            "CONTEXT_CACHE_ROOT": os.path.join(workdir, "cache", "context"),
+            "SESSION_DB": os.path.join(workdir, "cache", "sessions.db"),
+            "REQUEST_CACHE_DB": os.path.join(workdir, "cache", "requests.db"),
+            "NEON_PROJECT_DB": os.path.join(workdir, "cache", "neon_projects.db"),
+            "NEON_LEDGER_DB": os.path.join(workdir, "cache", "neon_ledger.db"),
+            # The bench only sweeps once, after the last level, so anything idle is fair game
+            "NEON_REAPER_ORPHAN_AGE": "0",
+            "NEON_REAPER_RETENTION": "0",
+            "NEON_REAPER_KEEP": "0",
+            "TEMPLATE_LOCAL": "1" if args.local_template else "0",
+            "TEMPLATE_URL": os.path.join(workdir, "template"),
+            "TEMPLATE_CACHE_ROOT": os.path.join(workdir, "cache", "template"),
+            "PREVIEW_PORT_START": "43000",
+            "PREVIEW_PORT_END": "43999",
+            "PREVIEW_MAX_COUNT": "1000",
+            "LOG_DIR": os.path.join(workdir, "logs"),
+            "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+            "LOG_LEVELS": "httpx=WARNING,httpcore=WARNING,asyncio=WARNING",
+            "BENCH_NPM_INSTALL_SECONDS": str(args.npm_install_seconds),
+            "BENCH_SERVER_START_SECONDS": str(args.server_start_seconds),
+            "PATH": os.path.join(BENCH_DIR, "bin") + os.pathsep + os.environ["PATH"],
+        }
+    )
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+async def run_level(
+    main: Any, remotes: str, concurrency: int, rounds: int, think_seconds: float = 0.0
+) -> dict[str, Any]:
+    from cc_vibecode.metrics import job_spans
+
+    samples: dict[str, list[float]] = defaultdict(list)
+    failures = 0
+
+    async def worker(index: int):
+        nonlocal failures
+        project = f"bench-c{concurrency}-w{index}"
+        for round_ in range(rounds):
+            if round_:
+                # A user reviewing the last feature, the pool refills meanwhile
+                await asyncio.sleep(think_seconds)
+            start = time.perf_counter()
+            with job_spans() as spans:
+                try:
+                    await main.execute(
+                        url=os.path.join(remotes, f"{project}.git"),
+                        proj_name=project,
+                        branch_name=f"feature{round_}",
+                        prompt=f"Build feature {round_} of {project}",
+                        first=round_ == 0,
+                    )
+                except Exception as e:
+                    failures += 1
+                    print(f"  {project} round {round_} failed: {e}", file=sys.stderr)
+                    continue
+            # A phase can run more than once per job (e.g. operation waits), sum them
+            per_job: dict[str, float] = defaultdict(float)
+            for item in spans:
+                per_job[item["name"]] += item["seconds"]
+            per_job["total"] = time.perf_counter() - start
+            for name, seconds in per_job.items():
+                samples[name].append(seconds)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    completed = len(samples.get("total", []))
+
+    for preview in main.previews.all():
+        await asyncio.to_thread(main.previews.stop, preview.project)
+
+    return {
+        "concurrency": concurrency,
+        "jobs": completed,
+        "failures": failures,
+        "wall_seconds": round(wall, 3),
+        "jobs_per_minute": round(completed / wall * 60, 2) if wall else 0.0,
+        "phases": {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+            }
+            for name, values in sorted(samples.items())
+        },
+    }
+
+
+def print_reap(report: Any):
+    print(
+        f"\nreaper{' (dry run)' if report.dry_run else ''}: {len(report.reclaimed)} reclaimed, "
+        f"{len(report.skipped)} skipped, {report.forgotten} forgotten, {len(report.errors)} errors"
+    )
+    for branch in report.reclaimed + report.skipped:
+        print(f"  {branch.reason:<11} {branch.name or branch.branch_id:<24} {branch.detail or 'reclaimed'}")
+
+
+def print_level(result: dict[str, Any]):
+    print(
+        f"\nconcurrency {result['concurrency']}: {result['jobs']} jobs, "
+        f"{result['failures']} failed, {result['wall_seconds']:.1f}s, "
+        f"{result['jobs_per_minute']:.1f} jobs/min"
+    )
+    print(f"  {'phase':<24} {'n':>4} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in result["phases"].items():
+        print(
+            f"  {name:<24} {stats['count']:>4} {stats['p50']:>8.3f} "
+            f"{stats['p95']:>8.3f} {stats['p99']:>8.3f}"
+        )
+
+
+async def bench(args: argparse.Namespace, workdir: str, neon: Any) -> list[dict[str, Any]]:
+    from bench.agent_stub import ScriptedAgent
+    from bench.github_stub import LocalGitHub, make_template
+    from cc_vibecode.blocking import shutdown as shutdown_stages
+    from cc_vibecode.metrics import span
+    import main
+
+    template = os.path.join(workdir, "template")
+    remotes = os.path.join(workdir, "remotes")
+    os.makedirs(remotes, exist_ok=True)
+    make_template(template)
+
+    github = LocalGitHub(
+        template,
+        create_seconds=args.github_create_seconds,
+        mirror_root=os.environ["GIT_MIRROR_ROOT"],
+    )
+    main.git = main.workspaces.git = github
+    if main.templates is not None:
+        main.templates.git = github
+    def create_role_sql(host, database, owner, owner_password, role_name) -> str:
+        # The stub's endpoints have no Postgres behind them, take a round trip instead
+        time.sleep(args.neon_latency)
+        neon.create_role_over_sql(host, role_name)
+        return f"bench-{role_name}"
+
+    main.neon._create_role_sql = span("neon.grant")(create_role_sql)
+    agent = ScriptedAgent(turns=args.agent_turns, turn_seconds=args.agent_turn_seconds)
+    main.query = agent.query
+
+    pool_task = asyncio.create_task(main.neon_pool.run()) if main.neon.pool else None
+    if main.templates is not None:
+        # The server warms the template at startup, keep that out of the first job
+        await asyncio.to_thread(main.templates.warm)
+    results = []
+    try:
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            result = await run_level(main, remotes, concurrency, args.rounds, args.think_seconds)
+            print_level(result)
+            results.append(result)
+        if args.reap and main.reaper is not None:
+            for dry_run in (True, False):
+                print_reap(await asyncio.to_thread(main.reaper.sweep, dry_run))
+    finally:
+        if pool_task:
+            pool_task.cancel()
+            await asyncio.to_thread(main.neon_pool.drain)
+        shutdown_stages()
+    return results
+
+
+def run(argv: list[str] | None = None):
+    args = parse_args(argv)
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="cc-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    from bench.neon_stub import NeonStub
+
+    neon = NeonStub(
+        latency=args.neon_latency,
+        op_seconds=args.neon_op_seconds,
+        lock_rate=args.neon_lock_rate,
+    )
+    configure_env(args, workdir, neon.start())
+    print(f"Workdir {workdir}, Neon stub at {neon.base_url}")
+
+    try:
+        results = asyncio.run(bench(args, workdir, neon))
+    finally:
+        neon.stop()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{neon.requests} Neon API requests")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "levels": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,25 @@
+import asyncio
+import contextvars
+import functools
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Shared pool for the blocking pipeline stages (git, npm, Neon polling, psycopg2)
+stage_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("STAGE_WORKERS", "8")), thread_name_prefix="stage"
+)
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the stage pool so the event loop stays responsive"""
+    loop = asyncio.get_running_loop()
+    # Carry context variables over to the worker thread like asyncio.to_thread does
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(stage_executor, call)
+
+
+def shutdown():
+    stage_executor.shutdown(wait=False, cancel_futures=True)
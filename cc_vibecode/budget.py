@@ -0,0 +1,68 @@
+import time
+
+from pydantic import BaseModel, PrivateAttr
+
+
+class AgentBudget(BaseModel):
+    """Limits on a single agent run, None means unlimited"""
+
+    max_turns: int | None = None
+    max_seconds: float | None = None
+    max_tool_uses: int | None = None
+
+    def narrowed(
+        self,
+        max_turns: int | None = None,
+        max_seconds: float | None = None,
+        max_tool_uses: int | None = None,
+    ) -> "AgentBudget":
+        """Apply a request's limits, which can tighten the server's but never loosen them"""
+
+        def tighter(limit, requested):
+            if limit is None or requested is None:
+                return requested if limit is None else limit
+            return min(limit, requested)
+
+        return AgentBudget(
+            max_turns=tighter(self.max_turns, max_turns),
+            max_seconds=tighter(self.max_seconds, max_seconds),
+            max_tool_uses=tighter(self.max_tool_uses, max_tool_uses),
+        )
+
+
+class BudgetUsage(BaseModel):
+    """What an agent run has used of its budget so far, updated as it runs"""
+
+    budget: AgentBudget
+    turns: int = 0
+    tool_uses: int = 0
+    seconds: float = 0.0
+    # Which limit stopped the run: turns, seconds or tool_uses
+    exceeded: str | None = None
+    _started: float | None = PrivateAttr(default=None)
+
+    def start(self):
+        if self._started is None:
+            self._started = time.monotonic()
+
+    def tick(self):
+        if self._started is not None:
+            self.seconds = round(time.monotonic() - self._started, 3)
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline"""
+        if self.budget.max_seconds is None:
+            return None
+        self.tick()
+        return max(0.0, self.budget.max_seconds - self.seconds)
+
+    def over_tool_uses(self) -> bool:
+        limit = self.budget.max_tool_uses
+        return limit is not None and self.tool_uses > limit
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, usage: BudgetUsage):
+        self.usage = usage
+        limit = getattr(usage.budget, f"max_{usage.exceeded}")
+        super().__init__(f"Agent stopped after exceeding its {usage.exceeded} budget ({limit})")
@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import subprocess
+
+from cc_vibecode.logger import create_logger
+from collections import defaultdict
+from pathlib import Path
+
+logger = create_logger("context")
+
+# Bump when the index format changes so stale cache entries are ignored
+INDEX_VERSION = 1
+SOURCE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx", ".mjs")
+# Where shared code lives in the template; exports elsewhere are page internals
+EXPORT_DIRS = ("lib", "components", "hooks", "types", "utils", "src/lib", "src/components")
+IGNORED_DIRS = {"node_modules", ".next", ".git", "dist", "build", "coverage"}
+HTTP_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
+
+MODEL_RE = re.compile(r"^\s*(model|enum)\s+(\w+)\s*\{(.*?)^\s*\}", re.M | re.S)
+EXPORT_RE = re.compile(
+    r"^export\s+(?:default\s+)?(?:async\s+)?(function|const|class|interface|type|enum)\s+(\w+)",
+    re.M,
+)
+METHOD_RE = re.compile(
+    r"^export\s+(?:async\s+)?(?:function|const)\s+(" + "|".join(HTTP_METHODS) + r")\b", re.M
+)
+
+
+class ContextBuilder:
+    """Indexes a workspace so the agent starts with a map of the project
+
+    The index (file tree, Prisma models, routes and shared exports) is
+    cached per commit SHA, so it is rebuilt only when the project changes.
+    """
+
+    def __init__(self, root: str = "cache/context", max_chars: int = 6000, max_files: int = 300):
+        self.root = os.path.abspath(root)
+        self.max_chars = max_chars
+        self.max_files = max_files
+        self._memory: dict[str, str] = {}
+
+    def _head(self, project_dir: str) -> str | None:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=project_dir, capture_output=True, text=True
+        )
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def _files(self, project_dir: str) -> list[str]:
+        result = subprocess.run(
+            ["git", "ls-files", "--cached", "--others", "--exclude-standard"],
+            cwd=project_dir,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode == 0:
+            files = result.stdout.splitlines()
+        else:
+            files = [
+                str(path.relative_to(project_dir))
+                for path in Path(project_dir).rglob("*")
+                if path.is_file()
+            ]
+        return sorted(
+            f for f in files if not IGNORED_DIRS.intersection(Path(f).parts)
+        )
+
+    def summary(self, project_dir: str) -> str | None:
+        """Return the project snapshot for the checkout's HEAD, building it on a miss"""
+        sha = self._head(project_dir)
+        if sha is None:
+            logger.info(f"{project_dir} is not a git checkout, skipping context")
+            return None
+
+        key = f"v{INDEX_VERSION}-{sha}"
+        if key in self._memory:
+            return self._memory[key]
+        cache_path = os.path.join(self.root, f"{key}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                summary = json.load(f)["summary"]
+            logger.info(f"Context cache hit for {sha[:12]}")
+        else:
+            summary = self._render(sha, self._index(project_dir))
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f"{cache_path}.tmp-{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump({"sha": sha, "summary": summary}, f)
+            os.replace(tmp, cache_path)
+            logger.info(f"Indexed {project_dir} at {sha[:12]} ({len(summary)} chars)")
+
+        self._memory[key] = summary
+        return summary
+
+    def _index(self, project_dir: str) -> dict:
+        files = self._files(project_dir)
+        index: dict = {
+            "files": files,
+            "scripts": {},
+            "dependencies": [],
+            "models": {},
+            "pages": [],
+            "routes": {},
+            "exports": {},
+        }
+
+        package = Path(project_dir) / "package.json"
+        if package.exists():
+            try:
+                data = json.loads(package.read_text())
+                index["scripts"] = data.get("scripts", {})
+                index["dependencies"] = sorted(
+                    {**data.get("dependencies", {}), **data.get("devDependencies", {})}
+                )
+            except ValueError:
+                pass
+
+        for name in files:
+            path = Path(project_dir) / name
+            if name.endswith(".prisma"):
+                index["models"].update(self._models(path.read_text(errors="replace")))
+            if not name.endswith(SOURCE_SUFFIXES):
+                continue
+            parts = Path(name).parts
+            stem = Path(name).stem
+            if "app" in parts and stem in ("page", "route"):
+                url = self._url(parts[parts.index("app") + 1 : -1])
+                if stem == "page":
+                    index["pages"].append(url)
+                else:
+                    source = path.read_text(errors="replace")
+                    index["routes"][url] = METHOD_RE.findall(source)
+            elif any(name.startswith(f"{d}/") for d in EXPORT_DIRS):
+                exports = [n for _, n in EXPORT_RE.findall(path.read_text(errors="replace"))]
+                if exports:
+                    index["exports"][name] = exports
+        return index
+
+    @staticmethod
+    def _url(segments: tuple[str, ...]) -> str:
+        # Route groups like (auth) do not appear in the URL
+        kept = [s for s in segments if not (s.startswith("(") and s.endswith(")"))]
+        return "/" + "/".join(kept)
+
+    @staticmethod
+    def _models(schema: str) -> dict[str, list[str]]:
+        models = {}
+        for kind, name, body in MODEL_RE.findall(schema):
+            fields = []
+            for line in body.splitlines():
+                line = line.split("//")[0].strip()
+                if not line or line.startswith("@@"):
+                    continue
+                tokens = line.split()
+                fields.append(tokens[0] if kind == "enum" else " ".join(tokens[:2]))
+            models[f"{kind} {name}"] = fields
+        return models
+
+    def _tree(self, files: list[str]) -> list[str]:
+        if len(files) <= self.max_files:
+            return files
+        # Too many files to list, summarize per directory instead
+        counts: dict[str, int] = defaultdict(int)
+        for name in files:
+            counts[str(Path(name).parent)] += 1
+        return [f"{d}/ ({n} files)" for d, n in sorted(counts.items())]
+
+    def _render(self, sha: str, index: dict) -> str:
+        sections = [f"Snapshot of the repository at commit {sha[:12]}, before your changes."]
+        if index["scripts"]:
+            sections.append(
+                "Scripts: " + ", ".join(f"{k}={v}" for k, v in index["scripts"].items())
+            )
+        if index["dependencies"]:
+            sections.append("Dependencies: " + ", ".join(index["dependencies"]))
+        if index["models"]:
+            sections.append(
+                "Prisma schema:\n"
+                + "\n".join(f"- {m}: {', '.join(f)}" for m, f in index["models"].items())
+            )
+        if index["pages"]:
+            sections.append("Pages: " + ", ".join(sorted(index["pages"])))
+        if index["routes"]:
+            sections.append(
+                "API routes:\n"
+                + "\n".join(
+                    f"- {url} {' '.join(methods) or '(no handlers)'}"
+                    for url, methods in sorted(index["routes"].items())
+                )
+            )
+        if index["exports"]:
+            sections.append(
+                "Shared exports:\n"
+                + "\n".join(f"- {f}: {', '.join(e)}" for f, e in sorted(index["exports"].items()))
+            )
+        sections.append("Files:\n" + "\n".join(self._tree(index["files"])))
+
+        summary = "\n\n".join(sections)
+        if len(summary) > self.max_chars:
+            summary = summary[: self.max_chars] + "\n... (truncated, list files for the rest)"
+        return summary
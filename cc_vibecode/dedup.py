@@ -0,0 +1,128 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from cc_vibecode.jobs import Job
+from cc_vibecode.logger import create_logger
+from contextlib import closing
+from pydantic import BaseModel
+from typing import Any
+
+logger = create_logger("dedup")
+
+# The frontend names follow-up branches "<title>_<Date.now()>", fresh on every submit
+BRANCH_TIMESTAMP = re.compile(r"_\d{13}$")
+
+
+class CachedResult(BaseModel):
+    job_id: str
+    message: str | None = None
+    previewUrl: str | None = None
+    result: dict[str, Any] | None = None
+    # The commit the job left the repository at
+    commit: str | None = None
+    finished_at: float
+
+
+class RequestCache:
+    """Collapses repeated execute requests onto one job
+
+    Requests are identified by repo URL, branch (less the frontend's
+    timestamp suffix, so a resubmitted feature matches), prompt and first flag. A
+    duplicate of a running job attaches to it; a duplicate of a job that
+    succeeded within the TTL gets its stored result. A stored result
+    matches when the remote is still at the commit the job started from, or
+    already at the commit the job pushed, so a retry after the agent's own
+    push is still recognized.
+    """
+
+    def __init__(self, path: str = "cache/requests.db", ttl: int = 24 * 3600):
+        self.path = os.path.abspath(path)
+        self.ttl = ttl
+        # request key -> (base SHA, job) for jobs not yet finished
+        self._inflight: dict[str, tuple[str | None, Job]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT NOT NULL,
+                    base_sha TEXT NOT NULL,
+                    commit_sha TEXT,
+                    job_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    finished_at REAL NOT NULL,
+                    PRIMARY KEY (key, base_sha)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def key(url: str, branch: str, prompt: str, first: bool) -> str:
+        digest = hashlib.sha256()
+        for part in (url, BRANCH_TIMESTAMP.sub("", branch), str(first), prompt):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def attach(self, key: str) -> Job | None:
+        """Running job for the same request, if any"""
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is None:
+                return None
+            if entry[1].done:
+                del self._inflight[key]
+                return None
+            return entry[1]
+
+    def track(self, key: str, base_sha: str | None, job: Job):
+        with self._lock:
+            self._inflight[key] = (base_sha, job)
+
+    def lookup(self, key: str, head: str | None) -> CachedResult | None:
+        """Stored result of the same request against the remote's current HEAD"""
+        if head is None:
+            return None
+        with self._lock, closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT payload FROM results "
+                "WHERE key = ? AND (base_sha = ? OR commit_sha = ?) AND finished_at > ? "
+                "ORDER BY finished_at DESC LIMIT 1",
+                (key, head, head, time.time() - self.ttl),
+            ).fetchone()
+        return CachedResult.model_validate_json(row[0]) if row else None
+
+    def record(self, job: Job, commit: str | None):
+        """Store a succeeded job's result for later duplicates of its request"""
+        with self._lock:
+            entry = next(
+                ((k, base) for k, (base, j) in self._inflight.items() if j.id == job.id), None
+            )
+            if entry is None:
+                return
+            key, base_sha = entry
+            del self._inflight[key]
+
+        cached = CachedResult(
+            job_id=job.id,
+            message=job.message,
+            previewUrl=job.previewUrl,
+            result=job.result,
+            commit=commit,
+            finished_at=time.time(),
+        )
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, base_sha or "", commit, job.id, cached.model_dump_json(), cached.finished_at),
+            )
+            db.execute("DELETE FROM results WHERE finished_at <= ?", (time.time() - self.ttl,))
+        logger.info(f"Cached result of job {job.id} at {(commit or '?')[:12]}")
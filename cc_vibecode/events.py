@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from cc_vibecode.logger import create_logger
+from collections import deque
+from typing import Any, AsyncIterator
+
+logger = create_logger("events")
+
+# Marks the end of a job's stream
+_END: dict[str, Any] = {"type": "end"}
+
+
+class Subscription:
+    """One client's bounded view of a job's events; drops the oldest when full"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event: dict[str, Any]):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                # A slow client loses old events instead of stalling the agent loop
+                self.queue.get_nowait()
+                self.dropped += 1
+
+
+class EventBus:
+    """Fans job events out to streaming subscribers"""
+
+    def __init__(self, buffer: int = 256, history: int = 200):
+        self.buffer = buffer
+        self.history = history
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._history: dict[str, deque] = {}
+        self._closed: set[str] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def publish(self, job_id: str, event: dict[str, Any]):
+        """Publish an event for a job, from the event loop or any other thread"""
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is not None and running is not loop:
+            loop.call_soon_threadsafe(self._publish, job_id, event)
+        else:
+            self._loop = running or loop
+            self._publish(job_id, event)
+
+    def _publish(self, job_id: str, event: dict[str, Any]):
+        event = {"jobId": job_id, "ts": time.time(), **event}
+        self._history.setdefault(job_id, deque(maxlen=self.history)).append(event)
+        for subscription in self._subscribers.get(job_id, ()):
+            subscription.put(event)
+
+    def close(self, job_id: str):
+        self._closed.add(job_id)
+        for subscription in self._subscribers.get(job_id, ()):
+            subscription.put(_END)
+
+    def forget(self, job_id: str):
+        self._history.pop(job_id, None)
+        self._closed.discard(job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Yield recent history, then live events until the job's stream ends"""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.buffer)
+        for event in self._history.get(job_id, ()):
+            subscription.put(event)
+        if job_id in self._closed:
+            subscription.put(_END)
+        self._subscribers.setdefault(job_id, set()).add(subscription)
+
+        try:
+            while True:
+                event = await subscription.queue.get()
+                if event is _END:
+                    return
+                yield event
+        finally:
+            self._subscribers[job_id].discard(subscription)
+            if subscription.dropped:
+                logger.info(f"Subscriber of {job_id} dropped {subscription.dropped} events")
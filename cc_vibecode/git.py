@@ -1,10 +1,14 @@
+import hashlib
 import subprocess
 import os
 import re
 import shutil
+import threading
+import time
 
 from cc_vibecode.logger import create_logger
-from github import Github, GithubException
+from cc_vibecode.metrics import span
+from github import Auth, Github, GithubException
 from github.AuthenticatedUser import AuthenticatedUser
 from typing import Dict, Any
 
@@ -12,8 +16,52 @@ logger = create_logger("git")
 
 
 class CustomGitAPI:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        mirror_root: str | None = None,
+        mirror_max_age: int = 300,
+        clone_depth: int | None = None,
+        clone_filter: str | None = None,
+        repo_cache_ttl: int = 3600,
+        ready_timeout: float = 60,
+    ):
         self.api_key = api_key
+        # Local bare mirrors that clones borrow objects from via alternates
+        self.mirror_root = os.path.abspath(mirror_root) if mirror_root else None
+        self.mirror_max_age = mirror_max_age
+        self.clone_depth = clone_depth
+        self.clone_filter = clone_filter
+        self._mirror_locks: Dict[str, threading.Lock] = {}
+        self._mirror_fetched: Dict[str, float] = {}
+        self._mirror_guard = threading.Lock()
+        # One pooled client for all jobs, and repos recently seen to exist
+        self.repo_cache_ttl = repo_cache_ttl
+        self.ready_timeout = ready_timeout
+        self._github: Github | None = None
+        self._known_repos: Dict[str, float] = {}
+        self._templates: Dict[str, Any] = {}
+        self._github_lock = threading.Lock()
+
+    @property
+    def github(self) -> Github:
+        with self._github_lock:
+            if self._github is None:
+                self._github = Github(auth=Auth.Token(self.api_key), pool_size=10)
+            return self._github
+
+    def _wait_until_ready(self, repo_url: str) -> bool:
+        """Poll until the template commit of a new repository is visible to git"""
+        deadline = time.monotonic() + self.ready_timeout
+        delay = 0.25
+        while True:
+            if self.remote_head(repo_url) is not None:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 4)
 
     def run_git_command(self, command: list, cwd: str | None = None) -> Dict[str, Any]:
         try:
@@ -51,6 +99,7 @@ class CustomGitAPI:
                 "error": e,
             }
 
+    @span("git.ensure_repo")
     def ensure_github_repo(self, repo_url: str, template_owner: str = "shnkreddy98", template_repo: str = "init_git") -> Dict[str, Any]:
         """
         Ensure a GitHub repository exists, creating it from a template if necessary.
@@ -91,13 +140,22 @@ class CustomGitAPI:
                     "message": "No GitHub token available",
                 }
 
-            # Initialize GitHub API client
-            g = Github(self.api_key)
+            full_name = f"{owner}/{repo_name}"
+            if time.time() - self._known_repos.get(full_name, 0) < self.repo_cache_ttl:
+                return {
+                    "success": True,
+                    "exists": True,
+                    "created": False,
+                    "message": f"Repository {full_name} exists (cached)",
+                }
+
+            g = self.github
 
             try:
                 # Check if repository exists
                 repo = g.get_repo(f"{owner}/{repo_name}")
                 logger.info(f"[GitHub] Repository {owner}/{repo_name} exists")
+                self._known_repos[full_name] = time.time()
                 return {
                     "success": True,
                     "exists": True,
@@ -112,8 +170,11 @@ class CustomGitAPI:
                     logger.info(f"[GitHub] Creating repository {owner}/{repo_name} from template {template_owner}/{template_repo}...")
 
                     try:
-                        # Get the template repository object
-                        template = g.get_repo(f"{template_owner}/{template_repo}")
+                        # Get the template repository object, once per process
+                        template_name = f"{template_owner}/{template_repo}"
+                        template = self._templates.get(template_name)
+                        if template is None:
+                            template = self._templates[template_name] = g.get_repo(template_name)
 
                         user = g.get_user()
                         if isinstance(user, AuthenticatedUser):
@@ -132,12 +193,16 @@ class CustomGitAPI:
                             f"✓ [GitHub] Created repository {owner}/{repo_name} from template"
                         )
 
-                        # Wait for GitHub to finish copying template files (async operation)
                         # GitHub creates the repo immediately but copies files in background
                         logger.info("Waiting for GitHub to copy template files...")
-                        import time
-                        time.sleep(5)  # Wait 5 seconds for template files to be copied
-                        logger.info("Template copy should be complete, proceeding with clone")
+                        if self._wait_until_ready(repo_url):
+                            logger.info("Template copy complete, proceeding with clone")
+                            self._known_repos[full_name] = time.time()
+                        else:
+                            logger.warning(
+                                f"Template commit not visible after {self.ready_timeout}s, "
+                                "proceeding with clone"
+                            )
 
                         return {
                             "success": True,
@@ -176,11 +241,106 @@ class CustomGitAPI:
                 "message": f"Exception: {e}",
             }
 
-    def clone(self, repo: str, destination: str = "tmp") -> Dict[str, Any]:
-        """Clone a git repository."""
+    @span("git.create_repo")
+    def create_github_repo(self, repo_url: str) -> Dict[str, Any]:
+        """Create an empty GitHub repository to push a locally built project to"""
+        match = re.search(r"github\.com[:/](.+?)/(.+?)(\.git)?$", repo_url)
+        if not match or not self.api_key:
+            return {
+                "success": False,
+                "created": False,
+                "message": "Not a GitHub URL" if not match else "No GitHub token available",
+            }
+        owner, repo_name = match.groups()[:2]
+        repo_name = repo_name.replace(".git", "")
+
+        try:
+            user = self.github.get_user()
+            if not isinstance(user, AuthenticatedUser):
+                return {"success": False, "created": False, "message": "Not authenticated"}
+            user.create_repo(
+                repo_name,
+                private=False,
+                description="Next.js application created from template",
+            )
+        except GithubException as e:
+            # Already created, e.g. by a retried first feature
+            if e.status != 422:
+                logger.error(f"[GitHub] Failed to create repository {owner}/{repo_name}: {e}")
+                return {"success": False, "created": False, "message": f"GitHub API error: {e}"}
+            logger.info(f"[GitHub] Repository {owner}/{repo_name} already exists")
+            return {"success": True, "created": False, "message": f"Repository {owner}/{repo_name} exists"}
+
+        logger.info(f"✓ [GitHub] Created empty repository {owner}/{repo_name}")
+        self._known_repos[f"{owner}/{repo_name}"] = time.time()
+        return {"success": True, "created": True, "message": f"Created repository {owner}/{repo_name}"}
+
+    @span("git.mirror")
+    def mirror(self, repo: str) -> str | None:
+        """Create or refresh the local bare mirror of repo and return its path"""
+        if not self.mirror_root:
+            return None
+
+        key = hashlib.sha1(repo.encode()).hexdigest()[:16]
+        path = os.path.join(self.mirror_root, f"{key}.git")
+        with self._mirror_guard:
+            lock = self._mirror_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if not os.path.isdir(path):
+                os.makedirs(self.mirror_root, exist_ok=True)
+                logger.info(f"Creating mirror of {repo} at {path}")
+                result = self.run_git_command(["git", "clone", "--mirror", repo, path])
+                if not result["success"]:
+                    shutil.rmtree(path, ignore_errors=True)
+                    return None
+                # Workspaces borrow objects from here, so git must never prune them
+                self.run_git_command(["git", "config", "gc.auto", "0"], cwd=path)
+                self._mirror_fetched[key] = time.time()
+            elif time.time() - self._mirror_fetched.get(key, 0) > self.mirror_max_age:
+                result = self.run_git_command(["git", "fetch", "--prune"], cwd=path)
+                if result["success"]:
+                    self._mirror_fetched[key] = time.time()
+
+        return path
+
+    @span("git.ls_remote")
+    def remote_head(self, repo: str) -> str | None:
+        """Commit SHA the remote's HEAD points at, None if it cannot be read"""
+        result = self.run_git_command(["git", "ls-remote", repo, "HEAD"])
+        if not result["success"] or not result["stdout"].strip():
+            return None
+        return result["stdout"].split()[0]
+
+    @span("git.clone")
+    def clone(
+        self,
+        repo: str,
+        destination: str = "tmp",
+        depth: int | None = None,
+        filter: str | None = None,
+    ) -> Dict[str, Any]:
+        """Clone a git repository, borrowing objects from a local mirror when available.
+
+        depth and filter default to the instance's; pass 0 and "" for a full clone.
+        """
         logger.info(f"Cloning repository: {repo} to {destination}")
-        command = ["git", "clone", repo, destination]
+        start_time = time.time()
+        command = ["git", "clone"]
+
+        depth = self.clone_depth if depth is None else depth
+        if depth:
+            command += ["--depth", str(depth)]
+        filter = self.clone_filter if filter is None else filter
+        if filter:
+            command += [f"--filter={filter}"]
+        reference = self.mirror(repo)
+        if reference:
+            command += ["--reference-if-able", reference]
+
+        command += [repo, destination]
         result = self.run_git_command(command)
+        result["duration"] = time.time() - start_time
 
         # move env vars
         if result["success"]:
@@ -191,7 +351,10 @@ class CustomGitAPI:
                 )
 
         if result["success"]:
-            logger.debug(f"✓ Successfully cloned {repo} to {destination}")
+            logger.info(
+                f"✓ Cloned {repo} to {destination} in {result['duration']:.2f}s "
+                f"(mirror: {'yes' if reference else 'no'})"
+            )
         else:
             logger.debug(f"✗ Failed to clone {repo}")
             logger.debug(f"  Error: {result['stderr']}")
@@ -0,0 +1,179 @@
+import asyncio
+import time
+import uuid
+
+from cc_vibecode.events import EventBus
+from cc_vibecode.logger import create_logger
+from cc_vibecode.metrics import metrics
+from enum import Enum
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Awaitable, Callable
+
+logger = create_logger("jobs")
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.queued
+    phase: str = "queued"
+    progress: float = 0.0
+    message: str | None = None
+    previewUrl: str | None = None
+    result: dict[str, Any] | None = None
+    # Timings of the instrumented phases the job went through
+    spans: list[dict[str, Any]] = Field(default_factory=list)
+    createdAt: float = Field(default_factory=time.time)
+    startedAt: float | None = None
+    finishedAt: float | None = None
+    request: dict[str, Any] = Field(default_factory=dict, exclude=True)
+    _events: EventBus | None = PrivateAttr(default=None)
+
+    def report(self, phase: str, progress: float):
+        """Record the pipeline phase the job has reached"""
+        logger.info(f"Job {self.id}: {self.phase} -> {phase}")
+        self.phase = phase
+        self.progress = progress
+        self.emit({"type": "phase", "phase": phase, "progress": progress})
+
+    def emit(self, event: dict[str, Any]):
+        """Push an event to clients streaming this job"""
+        if self._events is not None:
+            self._events.publish(self.id, event)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.succeeded, JobStatus.failed, JobStatus.cancelled)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """Bounded queue of execute jobs drained by a fixed pool of workers"""
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Awaitable[None]],
+        workers: int = 2,
+        maxsize: int = 100,
+        ttl: int = 3600,
+        events: EventBus | None = None,
+    ):
+        self.runner = runner
+        self.events = events
+        self.workers = workers
+        self.ttl = ttl
+        self.jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=maxsize)
+        self._tasks: list[asyncio.Task] = []
+        # Runner task per running job, so a single job can be cancelled
+        self._running: dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        for idx in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(idx)))
+        logger.info(f"Started {self.workers} job workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def submit(self, request: dict[str, Any]) -> Job:
+        self._prune()
+        job = Job(request=request)
+        job._events = self.events
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics.inc("jobs_rejected_total")
+            raise QueueFullError("Job queue is full, try again later")
+        self.jobs[job.id] = job
+        metrics.inc("jobs_submitted_total")
+        logger.info(f"Queued job {job.id} ({self._queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Stop a queued or running job; a running job is cancelled in its worker"""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            logger.info(f"Cancelling job {job_id}")
+            task.cancel()
+        else:
+            # Still queued, the worker skips it
+            job.status = JobStatus.cancelled
+            job.message = "Job cancelled"
+            self._finish(job)
+        return job
+
+    def waiting(self) -> int:
+        return self._queue.qsize()
+
+    def running(self) -> int:
+        return sum(job.status == JobStatus.running for job in self.jobs.values())
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finishedAt and job.finishedAt < cutoff:
+                del self.jobs[job_id]
+                if self.events is not None:
+                    self.events.forget(job_id)
+
+    def _finish(self, job: Job):
+        job.finishedAt = time.time()
+        metrics.inc("jobs_finished_total", status=job.status.value)
+        if job.startedAt is not None:
+            metrics.observe("job_seconds", job.finishedAt - job.startedAt)
+        job.emit({"type": "status", "status": job.status, "message": job.message})
+        if self.events is not None:
+            self.events.close(job.id)
+
+    async def _worker(self, idx: int):
+        while True:
+            job = await self._queue.get()
+            if job.done:
+                # Cancelled while it was queued
+                self._queue.task_done()
+                continue
+            job.status = JobStatus.running
+            job.startedAt = time.time()
+            job.emit({"type": "status", "status": job.status})
+            logger.info(f"Worker {idx} picked up job {job.id}")
+            task = asyncio.create_task(self.runner(job))
+            self._running[job.id] = task
+            try:
+                await task
+                job.status = JobStatus.succeeded
+                job.report("done", 1.0)
+            except asyncio.CancelledError:
+                job.status = JobStatus.cancelled
+                job.message = "Job cancelled"
+                # Re-raise only when the worker itself is stopping, not for a cancelled job
+                if asyncio.current_task().cancelling():  # type: ignore[union-attr]
+                    raise
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                job.status = JobStatus.failed
+                job.message = str(e)
+            finally:
+                self._running.pop(job.id, None)
+                self._finish(job)
+                self._queue.task_done()
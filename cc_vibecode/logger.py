@@ -1,26 +1,157 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import reprlib
+import time
+from typing import Any
 
 # Global flag to ensure logging is configured only once
 _logging_configured = False
+_listener: logging.handlers.QueueListener | None = None
+
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+# Level of the console and, unless LOG_FILE_LEVEL is set, the log file
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE_LEVEL = os.getenv("LOG_FILE_LEVEL", LOG_LEVEL).upper()
+# Per-logger overrides, e.g. "agent=DEBUG,httpx=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING,httpcore=WARNING,asyncio=WARNING")
+# Longest message written, anything beyond is cut
+LOG_MAX_CHARS = int(os.getenv("LOG_MAX_CHARS", "4000"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024**2)))
+LOG_ROTATE_SECONDS = int(os.getenv("LOG_ROTATE_SECONDS", "86400"))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "10"))
+# Records queued for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+def _cut(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit} more chars)"
+
+
+class clip:
+    """Lazily rendered, size-bounded view of a log argument
+
+    Rendering costs at most about `limit` characters whatever the size of
+    the value, and nothing at all if the record is filtered out by level.
+    """
+
+    def __init__(self, value: Any, limit: int | None = None):
+        self.value = value
+        self.limit = limit or LOG_MAX_CHARS
+
+    def __str__(self) -> str:
+        if isinstance(self.value, str):
+            return _cut(self.value, self.limit)
+        short = reprlib.Repr()
+        # Keep nested strings short enough that a whole container stays near the limit
+        short.maxstring = short.maxother = max(40, self.limit // 8)
+        short.maxlist = short.maxdict = short.maxtuple = 20
+        short.maxlevel = 4
+        return _cut(short.repr(self.value), self.limit)
+
+
+class TruncatingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread, whose formatters cut oversized messages"""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the event loop on a backed up disk
+            pass
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats here, on the caller's thread, and folds the
+        # traceback into msg; leave both to the listener's formatters
+        return copy.copy(record)
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Cuts the message but not the traceback that follows it"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = _cut(record.message, LOG_MAX_CHARS)
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": _cut(record.getMessage(), LOG_MAX_CHARS),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    """Rotates when the file grows past max_bytes or every interval seconds"""
+
+    def __init__(self, filename: str, max_bytes: int, interval: int, backups: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self.interval = interval
+        self.rollover_at = time.time() + interval if interval > 0 else None
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rollover_at is not None:
+            self.rollover_at = time.time() + self.interval
+
+
+def _configure():
+    global _listener
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = RotatingLogHandler(
+        os.path.join(LOG_DIR, "app.jsonl"), LOG_MAX_BYTES, LOG_ROTATE_SECONDS, LOG_BACKUPS
+    )
+    file_handler.setLevel(LOG_FILE_LEVEL)
+    file_handler.setFormatter(JsonFormatter())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(LOG_LEVEL)
+    stream_handler.setFormatter(
+        TruncatingFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+
+    # Formatting and disk writes happen on the listener's thread, not the caller's
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [TruncatingQueueHandler(log_queue)]
+    root.setLevel(min(logging.getLevelName(LOG_LEVEL), logging.getLevelName(LOG_FILE_LEVEL)))
+    for override in filter(None, LOG_LEVELS.split(",")):
+        name, _, level = override.partition("=")
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
 
 
 def create_logger(name: str):
     global _logging_configured
 
     if not _logging_configured:
-        os.makedirs("logs", exist_ok=True)
-        date_fmt = datetime.now().strftime("%Y%m%d-%H%M.log")
-        log_filename = f"app-{date_fmt}"
-        log_path = os.path.join("logs", log_filename)
-
-        # logging configuration with name in format
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            handlers=[logging.FileHandler(log_path), logging.StreamHandler()],
-        )
+        _configure()
         _logging_configured = True
 
     logger = logging.getLogger(name)
@@ -0,0 +1,140 @@
+import contextvars
+import threading
+import time
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# Seconds; spans range from sub-second API calls to agent runs of many minutes
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+PREFIX = "cc_vibecode"
+
+# Spans finished within the current job, shared by the threads it hands work to
+_job_spans: contextvars.ContextVar[list[dict[str, Any]] | None] = contextvars.ContextVar(
+    "job_spans", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """In-process span histograms, counters and gauges in Prometheus text format"""
+
+    def __init__(self):
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._help: dict[str, str] = {
+            "span_seconds": "Duration of instrumented phases",
+            "span_failures_total": "Instrumented phases that raised",
+        }
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            series.setdefault(key, Histogram()).observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def gauge(self, name: str, fn: Callable[[], float], help: str = ""):
+        """Register a gauge whose value is read when metrics are scraped"""
+        self._gauges[name] = fn
+        if help:
+            self._help[name] = help
+
+    def render(self) -> str:
+        lines: list[str] = []
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {PREFIX}_{name} {self._help[name]}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                header(name, "histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        labels = _labels(key + (("le", str(bound)),))
+                        lines.append(f"{PREFIX}_{name}_bucket{labels} {cumulative}")
+                    lines.append(f"{PREFIX}_{name}_sum{_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{PREFIX}_{name}_count{_labels(key)} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                header(name, "counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}_{name}{_labels(key)} {value:g}")
+
+        for name, fn in sorted(self._gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            header(name, "gauge")
+            lines.append(f"{PREFIX}_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a phase into the span histogram and the current job's spans
+
+    Works as a context manager or a decorator.
+    """
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        metrics.inc("span_failures_total", span=name)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        metrics.observe("span_seconds", seconds, span=name)
+        spans = _job_spans.get()
+        if spans is not None:
+            spans.append({"name": name, "seconds": round(seconds, 3), "ok": ok})
+
+
+@contextmanager
+def job_spans() -> Iterator[list[dict[str, Any]]]:
+    """Collect the spans finished in this context, including its threads and tasks"""
+    spans: list[dict[str, Any]] = []
+    token = _job_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _job_spans.reset(token)
@@ -1,26 +1,56 @@
 import httpx
 import os
 import psycopg2 #type: ignore
+import secrets
+import threading
 import time
 
 from cc_vibecode.logger import create_logger
+from cc_vibecode.metrics import span
+from cc_vibecode.neon_index import NeonProject, ProjectIndex
+from cc_vibecode.neon_ledger import BranchLedger, BranchState
+from cc_vibecode.retry import send_with_retry
+from cc_vibecode.waiter import WaitFailed, wait_all, wait_until
 
 from dotenv import load_dotenv
 from neon_api import NeonAPI #type: ignore
+from neon_api.exceptions import NeonAPIError #type: ignore
+from psycopg2 import sql #type: ignore
 from neon_api.schema import ( #type: ignore
     Branch1,
+    BranchOperations,
     Database,
     ProjectListItem,
-    Endpoint,
+    EndpointOperations,
     EndpointState,
+    OperationStatus,
     Role,
     Project,
 )
 from pydantic import BaseModel
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from cc_vibecode.neon_pool import NeonBranchPool
 
 load_dotenv("env_vars/.env")
 logger = create_logger("neon")
 
+FAILED_OPERATION_STATUSES = (
+    OperationStatus.failed,
+    OperationStatus.error,
+    OperationStatus.cancelled,
+)
+# Run with the role creation, in the same transaction; {role} is the app role
+ROLE_GRANTS = (
+    "GRANT USAGE, CREATE ON SCHEMA public TO {role}",
+    "GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO {role}",
+    "GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO {role}",
+    # Tables the owner creates later (e.g. Prisma migrations) stay accessible
+    "ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON TABLES TO {role}",
+    "ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON SEQUENCES TO {role}",
+)
+
 
 class BranchInfo(BaseModel):
     id: str
@@ -33,65 +63,123 @@ class BranchInfo(BaseModel):
     endpoint_id: str
 
 
+class RetryingNeonAPI(NeonAPI):
+    """NeonAPI whose requests retry 423/429/5xx with jittered backoff"""
+
+    def _request(self, method: str, path: str, **kwargs):
+        headers = kwargs.pop("headers", {})
+        headers["Authorization"] = f"Bearer {self._api_key}"
+        headers["Accept"] = "application/json"
+        headers["Content-Type"] = "application/json"
+        headers["User-Agent"] = self.user_agent
+
+        r = send_with_retry(
+            lambda: self._session.request(
+                method, self.base_url + path, headers=headers, **kwargs
+            ),
+            what=f"{method} {path}",
+            # A POST may have created the branch or endpoint before failing
+            idempotent=method != "POST",
+        )
+        if not r.ok:
+            raise NeonAPIError(r.text)
+        return r.json()
+
+
 class CustomNeonAPI:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        sql_roles: bool = True,
+        projects: ProjectIndex | None = None,
+        ledger: BranchLedger | None = None,
+    ):
         self.api_key = api_key
-        self.neon = NeonAPI(api_key=self.api_key)
-        self.BASE_URL = "https://console.neon.tech/api/v2"
+        self.BASE_URL = (base_url or "https://console.neon.tech/api/v2").rstrip("/")
+        self.neon = RetryingNeonAPI(api_key=self.api_key, base_url=f"{self.BASE_URL}/")
+        # One keep-alive pool for the endpoints neon_api does not wrap
+        self.http = httpx.Client(
+            base_url=self.BASE_URL,
+            headers={
+                "Accept": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            timeout=30,
+        )
+        self.pool: "NeonBranchPool | None" = None
+        # Our project name -> Neon project, so fork does not list every project
+        self.projects = projects
+        # Branches we created, for the reaper
+        self.ledger = ledger
+        # Create app roles over SQL instead of the roles API
+        self.sql_roles = sql_roles
+        # Owner role name and password per project, kept in memory only
+        self._owners: dict[str, tuple[str, str]] = {}
+        self._databases: dict[str, str] = {}
+        self._owners_lock = threading.Lock()
+
+    def _http(self, method: str, path: str, **kwargs) -> httpx.Response:
+        return send_with_retry(
+            lambda: self.http.request(method, path, **kwargs),
+            what=f"{method} {path}",
+            idempotent=method != "POST",
+        )
 
+    @span("neon.wait_branch")
     def _wait_for_branch_ready(
         self, proj_id: str, branch_id: str, timeout: int = 60
     ) -> bool:
         """Wait for branch to be ready"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        def check() -> bool:
             branch_response = self.neon.branch(proj_id, branch_id)
-            branch = branch_response.branch  # type: ignore
-            if branch.current_state == "ready":
-                logger.info(f"Branch {branch_id} is ready")
-                return True
-            logger.info(f"Waiting for branch... current state: {branch.current_state}")
-            time.sleep(2)
-        return False
+            return branch_response.branch.current_state == "ready"  # type: ignore
+
+        return wait_until(f"branch {branch_id}", check, timeout).ready
 
+    @span("neon.wait_endpoint")
     def _wait_for_endpoint_active(
         self, proj_id: str, endpoint_id: str, timeout: int = 60
     ) -> bool:
         """Wait for endpoint to be active"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        def check() -> bool:
             endpoint_response = self.neon.endpoint(proj_id, endpoint_id)
-            endpoint = endpoint_response.endpoint  # type: ignore
-            if endpoint.current_state == EndpointState.active:
-                logger.info(f"Endpoint {endpoint_id} is active")
-                return True
-            logger.info(
-                f"Waiting for endpoint... current state: {endpoint.current_state}"
-            )
-            time.sleep(2)
-        return False
+            return endpoint_response.endpoint.current_state == EndpointState.active  # type: ignore
+
+        return wait_until(f"endpoint {endpoint_id}", check, timeout).ready
+
+    @span("neon.wait_operations")
+    def _wait_for_operations(
+        self, proj_id: str, operation_ids: list[str], timeout: int = 60
+    ) -> bool:
+        """Wait for the operations a create call returned to finish, all at once"""
+        def check_for(operation_id: str):
+            def check() -> bool:
+                operation_response = self.neon.operation(proj_id, operation_id)
+                status = operation_response.operation.status  # type: ignore
+                if status in FAILED_OPERATION_STATUSES:
+                    raise WaitFailed(f"Operation {operation_id} {status.value}")
+                return status in (OperationStatus.finished, OperationStatus.skipped)
+            return check
+
+        results = wait_all(
+            {f"operation {op_id}": check_for(op_id) for op_id in operation_ids},
+            timeout,
+        )
+        return all(result.ready for result in results.values())
 
     def _get_project(self, proj_id: str) -> dict | None:
-        url = f"{self.BASE_URL}/projects/{proj_id}"
-        headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        with httpx.Client() as client:
-            res = client.get(
-                url=url,
-                headers=headers,
-            )
+        res = self._http("GET", f"/projects/{proj_id}")
 
         if 200 <= res.status_code <= 299:
             return res.json()
 
         return None
 
+    @span("neon.wait_project")
     def _wait_for_project_ready(self, proj_id: str, timeout: int = 120) -> bool:
         """Wait for project to be ready after creation"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        def check() -> bool:
             try:
                 project_response = self._get_project(proj_id)
                 if project_response:
@@ -101,44 +189,19 @@ class CustomNeonAPI:
 
                 # Check if we can list branches (means project is ready)
                 self.neon.branches(proj_id)
-                logger.info(f"Project {proj_id} is ready")
                 return True
             except Exception as e:
                 logger.info(f"Waiting for project... {str(e)}")
-                time.sleep(3)
-        return False
+                return False
+
+        return wait_until(f"project {proj_id}", check, timeout).ready
 
-    def _launch_branch(
-        self, proj_id: str, name: str, max_retries: int = 10
-    ) -> Branch1 | Exception:
+    def _launch_branch(self, proj_id: str, name: str) -> BranchOperations:
         args = {
             "branch": {"name": f"{name}_branch"},
         }
-
-        for attempt in range(max_retries):
-            try:
-                results_response = self.neon.branch_create(proj_id, **args)
-                return results_response.branch  # type: ignore
-            except Exception as e:
-                error_str = str(e)
-
-                # Handle project locked (423)
-                if "423" in error_str or "conflicting operations" in error_str:
-                    if attempt < max_retries - 1:
-                        wait_time = 5 * (attempt + 1)  # Exponential backoff
-                        logger.info(
-                            f"Project locked, waiting {wait_time}s before retry {attempt + 1}/{max_retries}"
-                        )
-                        time.sleep(wait_time)
-                    else:
-                        logger.error("Max retries reached, project still locked")
-                        raise e
-                else:
-                    # For any other error, raise it immediately
-                    raise e
-
-        # If we exit the loop without returning, something went wrong
-        raise Exception(f"Failed to create or retrieve branch after {max_retries} attempts")
+        # 423 "project locked" is retried with backoff by RetryingNeonAPI
+        return self.neon.branch_create(proj_id, **args)
 
     def _get_projects(self) -> list[ProjectListItem]:
         project_response = self.neon.projects()
@@ -148,7 +211,7 @@ class CustomNeonAPI:
         databases_response = self.neon.databases(proj_id, branch_id)
         return databases_response.databases[0]  # type: ignore
 
-    def _create_endpoint(self, proj_id: str, branch_id: str, name: str) -> Endpoint:
+    def _create_endpoint(self, proj_id: str, branch_id: str, name: str) -> EndpointOperations:
         args = {
             "endpoint": {
                 "type": "read_write",
@@ -156,8 +219,7 @@ class CustomNeonAPI:
                 "name": f"{name}_endpoint",
             }
         }
-        endpoint_response = self.neon.endpoint_create(proj_id, **args)
-        return endpoint_response.endpoint  # type: ignore
+        return self.neon.endpoint_create(proj_id, **args)
 
     def _create_role(self, proj_id: str, branch_id: str, role_name: str) -> Role:
         role_response = self.neon.role_create(proj_id, branch_id, role_name)
@@ -166,19 +228,19 @@ class CustomNeonAPI:
     def _schema_diff(
         self, proj_id: str, branch_id: str, base_branch_id: str, db_name: str
     ):
-        url = f"{self.BASE_URL}/projects/{proj_id}/branches/{branch_id}/compare_schema"
-        headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
         params = {"base_branch_id": base_branch_id, "db_name": db_name}
-        with httpx.Client() as client:
-            res = client.get(url=url, headers=headers, params=params)
+        res = self._http(
+            "GET",
+            f"/projects/{proj_id}/branches/{branch_id}/compare_schema",
+            params=params,
+        )
 
         if 200 <= res.status_code <= 299:
             return res.json()
 
-    def _grant_schema_permissions(self, connection_string: str, role_name: str):
+    @staticmethod
+    @span("neon.grant")
+    def _grant_schema_permissions(connection_string: str, role_name: str):
         """Grant CREATE permissions using an existing owner connection"""
         try:
             conn = psycopg2.connect(connection_string)
@@ -203,6 +265,98 @@ class CustomNeonAPI:
             logger.error(f"✗ Error: {e}")
             return False
 
+    @staticmethod
+    @span("neon.grant")
+    def _create_role_sql(
+        host: str, database: str, owner: str, owner_password: str, role_name: str
+    ) -> str:
+        """Create the app role with its grants in one transaction, return its password"""
+        password = secrets.token_urlsafe(24)
+        role = sql.Identifier(role_name)
+        conn = psycopg2.connect(
+            host=host, dbname=database, user=owner, password=owner_password, connect_timeout=10
+        )
+        try:
+            # Commits on success, rolls back everything on any error
+            with conn, conn.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("CREATE ROLE {} WITH LOGIN PASSWORD %s").format(role), (password,)
+                )
+                for statement in ROLE_GRANTS:
+                    cursor.execute(sql.SQL(statement).format(role=role))
+        finally:
+            conn.close()
+        logger.info(f"✓ Created role {role_name} with grants")
+        return password
+
+    def _owner(self, proj_id: str, branch_id: str, refresh: bool = False) -> tuple[str, str]:
+        """Owner credentials of a project, resetting the password only when unknown or stale"""
+        with self._owners_lock:
+            cached = self._owners.get(proj_id)
+        if cached is not None and not refresh:
+            return cached
+
+        indexed = self.projects.by_project_id(proj_id) if self.projects else []
+        owner_name = next((p.owner_role for p in indexed if p.owner_role), None)
+        if owner_name is None:
+            roles_response = self.neon.roles(proj_id, branch_id)
+            owner_role = None
+            for role in roles_response.roles:  # type: ignore
+                if role.protected or "_owner" in role.name:
+                    owner_role = role
+                    break
+
+            if not owner_role:
+                owner_role = roles_response.roles[0]  # type: ignore
+            owner_name = owner_role.name
+            if self.projects is not None:
+                self.projects.update(proj_id, owner_role=owner_name)
+
+        # Reset owner password (endpoint must exist first!)
+        logger.info(f"Resetting password for owner role: {owner_name}")
+        owner_reset_response = self.neon.role_password_reset(
+            proj_id, branch_id, owner_name
+        )
+        owner_role = owner_reset_response.role  # type: ignore
+        logger.info("✓ Owner password reset")
+
+        # Branches created from this one inherit the password
+        with self._owners_lock:
+            self._owners[proj_id] = (owner_role.name, owner_role.password)
+        return owner_role.name, owner_role.password
+
+    def _create_app_role(
+        self, proj_id: str, branch_id: str, host: str, database: str, role_name: str
+    ) -> tuple[str, str | None]:
+        """Create the branch's app role, over SQL when possible, else through the API"""
+        if self.sql_roles:
+            for refresh in (False, True):
+                owner, owner_password = self._owner(proj_id, branch_id, refresh)
+                try:
+                    password = self._create_role_sql(
+                        host, database, owner, owner_password, role_name
+                    )
+                    return role_name, password
+                except psycopg2.OperationalError as e:
+                    # A branch off a parent whose password was never reset here
+                    if not refresh and "password authentication failed" in str(e):
+                        logger.info("Cached owner password rejected, resetting it")
+                        continue
+                    logger.warning(f"SQL role creation failed, using the API: {e}")
+                except psycopg2.Error as e:
+                    logger.warning(f"SQL role creation failed, using the API: {e}")
+                break
+
+        # The cached password may not be valid on this branch, reset it before granting
+        owner, owner_password = self._owner(proj_id, branch_id, refresh=True)
+        role = self._create_role(proj_id, branch_id, role_name)
+        logger.info(f"Role created with name: {role.name}")
+        if not self._grant_schema_permissions(
+            f"postgresql://{owner}:{owner_password}@{host}/{database}", role.name
+        ):
+            raise Exception(f"Could not grant schema permissions to {role.name}")
+        return role.name, role.password
+
     def _delete_role(self, proj_id: str, branch_id: str, role_name: str):
         return self.neon.role_delete(proj_id, branch_id, role_name)
 
@@ -213,16 +367,9 @@ class CustomNeonAPI:
         return self.neon.branch_delete(proj_id, branch_id)
 
     def _promote_to_main(self, proj_id: str, branch_id: str):
-        url = f"{self.BASE_URL}/projects/{proj_id}/branches/{branch_id}/set_as_default"
-        headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        with httpx.Client() as client:
-            res = client.post(
-                url=url,
-                headers=headers,
-            )
+        res = self._http(
+            "POST", f"/projects/{proj_id}/branches/{branch_id}/set_as_default"
+        )
 
         if 200 <= res.status_code <= 299:
             return res.json()
@@ -240,10 +387,34 @@ class CustomNeonAPI:
         project_response = self.neon.project_create(**data)
         return project_response.project  # type: ignore
 
-    def fork(self, project_name: str, branch_name: str) -> BranchInfo | Exception:
+    def _get_branches(self, proj_id: str) -> list[Branch1]:
+        return self.neon.branches(proj_id).branches  # type: ignore
+
+    def _get_default_branch(self, proj_id: str) -> Branch1 | None:
+        for branch in self._get_branches(proj_id):
+            if branch.default:
+                return branch
+        return None
+
+    def _rename_branch(self, proj_id: str, branch_id: str, name: str) -> Branch1:
+        args = {"branch": {"name": f"{name}_branch"}}
+        branch_response = self.neon.branch_update(proj_id, branch_id, **args)
+        return branch_response.branch  # type: ignore
+
+    def _select_project(self, project_name: str, branch_name: str) -> NeonProject:
+        """The Neon project of one of our projects, listing projects only on an index miss"""
+        if self.projects is not None:
+            indexed = self.projects.get(project_name)
+            if indexed is not None:
+                return indexed
+
         projects = self._get_projects()
-        if len(projects) == 0:
-            logger.info("No Projects found, creating one..")
+        project = next((p for p in projects if p.name == project_name), None)
+        if project is not None:
+            logger.info(f"Found Neon project {project.id} for {project_name}")
+        else:
+            # Sharing another project would fork and promote its database
+            logger.info(f"No Neon project named {project_name}, creating one..")
             project = self._create_project(
                 project_name=project_name, branch_name=branch_name
             )
@@ -251,75 +422,151 @@ class CustomNeonAPI:
             # Wait for project to be ready
             if not self._wait_for_project_ready(project.id):
                 logger.error("Timeout waiting for project to be ready")
-        else:
-            logger.info("Found project, selecting one...")
-            project = projects[0]
 
+        selected = NeonProject(name=project_name, project_id=project.id)
+        if self.projects is not None:
+            self.projects.put(selected)
+        return selected
+
+    def _default_branch_id(self, project: NeonProject) -> str | None:
+        if project.default_branch_id is not None:
+            return project.default_branch_id
+        default_branch = self._get_default_branch(project.project_id)
+        if default_branch is None:
+            return None
+        if self.projects is not None:
+            self.projects.update(project.project_id, default_branch_id=default_branch.id)
+        return default_branch.id
+
+    @span("neon.provision")
+    def _provision(self, proj_id: str, branch_name: str, owner: str | None = None) -> BranchInfo:
+        """Create a branch with its own endpoint and app role off the default branch"""
         # Create Branch
-        branch = self._launch_branch(project.id, branch_name)
-        if isinstance(branch, Exception):
-            raise branch
+        branch_response = self._launch_branch(proj_id, branch_name)
+        branch = branch_response.branch
         logger.info(f"Branch Created with id: {branch.id}")
+        if self.ledger is not None:
+            self.ledger.record(proj_id, branch.id, branch.name, owner)
 
-        # Wait for branch to be ready
-        if not self._wait_for_branch_ready(project.id, branch.id):
+        # Wait for branch to be ready, via its operations when Neon returned them
+        operation_ids = [op.id for op in branch_response.operations]
+        if operation_ids:
+            ready = self._wait_for_operations(proj_id, operation_ids)
+        else:
+            ready = self._wait_for_branch_ready(proj_id, branch.id)
+        if not ready:
             logger.info("Timeout waiting for branch to be ready")
             raise Exception("Branch not ready")
 
-        # Get database
-        database = self._get_database(project.id, branch.id)
+        # Branches share the parent's databases, so the name is looked up once
+        database_name = self._databases.get(proj_id)
+        if database_name is None:
+            database_name = self._databases[proj_id] = self._get_database(proj_id, branch.id).name
 
         # Create Endpoint FIRST (required for role operations)
-        endpoint = self._create_endpoint(project.id, branch.id, branch_name)
+        endpoint_response = self._create_endpoint(proj_id, branch.id, branch_name)
+        endpoint = endpoint_response.endpoint
         logger.info(f"Endpoint created with id: {endpoint.id}")
+        if self.ledger is not None:
+            self.ledger.attach(branch.id, endpoint_id=endpoint.id)
 
         # Wait for endpoint to be active
-        if not self._wait_for_endpoint_active(project.id, endpoint.id):
+        operation_ids = [op.id for op in endpoint_response.operations]
+        if operation_ids:
+            ready = self._wait_for_operations(proj_id, operation_ids)
+        else:
+            ready = self._wait_for_endpoint_active(proj_id, endpoint.id)
+        if not ready:
             logger.info("Timeout waiting for endpoint to be active")
             raise Exception("Endpoint not active")
 
-        # NOW we can get and reset the owner role password
-        roles_response = self.neon.roles(project.id, branch.id)
-        owner_role = None
-        for role in roles_response.roles:  # type: ignore
-            if role.protected or "_owner" in role.name:
-                owner_role = role
-                break
-
-        if not owner_role:
-            owner_role = roles_response.roles[0]  # type: ignore
-
-        # Reset owner password (endpoint must exist first!)
-        logger.info(f"Resetting password for owner role: {owner_role.name}")
-        owner_reset_response = self.neon.role_password_reset(
-            project.id, branch.id, owner_role.name
+        user, password = self._create_app_role(
+            proj_id, branch.id, endpoint.host, database_name, branch_name
         )
-        owner_role = owner_reset_response.role  # type: ignore
-        logger.info("✓ Owner password reset")
-
-        # Create the owner connection string
-        owner_connection_string = f"postgresql://{owner_role.name}:{owner_role.password}@{endpoint.host}/{database.name}"
-
-        # Create new Role
-        role = self._create_role(project.id, branch.id, branch_name)
-        logger.info(f"Role created with name: {role.name}")
-
-        # Grant permissions
-        self._grant_schema_permissions(owner_connection_string, role.name)
+        if self.ledger is not None:
+            self.ledger.attach(branch.id, role=user)
 
         return BranchInfo(
             id=branch.id,
             name=branch.name,
-            database=database.name,
-            user=role.name,
-            password=role.password,
+            database=database_name,
+            user=user,
+            password=password,
             host=endpoint.host,
-            project_id=project.id,
+            project_id=proj_id,
             endpoint_id=endpoint.id,
         )
 
+    @span("neon.fork")
+    def fork(
+        self, project_name: str, branch_name: str, owner: str | None = None
+    ) -> BranchInfo | Exception:
+        project = self._select_project(project_name, branch_name)
+        try:
+            # Hand out a pre-provisioned branch when the warm pool has one
+            if self.pool is not None:
+                # Refilled after promote, a bundle made now would fork the old default
+                self.pool.watch(project.project_id)
+                default_branch_id = self._default_branch_id(project)
+                if default_branch_id is not None:
+                    branch_info = self.pool.acquire(project.project_id, default_branch_id)
+                    if branch_info is not None:
+                        branch = self._rename_branch(
+                            project.project_id, branch_info.id, branch_name
+                        )
+                        logger.info(f"Using pooled branch {branch.id} as {branch.name}")
+                        if self.ledger is not None:
+                            self.ledger.claim(branch.id, owner)
+                        self.pool.lease(project.project_id, branch.id)
+                        return branch_info.model_copy(update={"name": branch.name})
+
+            branch_info = self._provision(project.project_id, branch_name, owner)
+            if self.pool is not None:
+                self.pool.lease(project.project_id, branch_info.id)
+            return branch_info
+        except NeonAPIError:
+            # The indexed project may be gone or its default branch stale
+            if self.projects is not None:
+                self.projects.forget(project_name)
+            raise
+
+    @span("neon.release")
+    def release(self, branch_info: BranchInfo):
+        """Delete everything fork created for a branch that will not be promoted"""
+        if self.pool is not None:
+            self.pool.unlease(branch_info.id)
+        for cleanup in (
+            lambda: self._delete_role(branch_info.project_id, branch_info.id, branch_info.user),
+            lambda: self._delete_endpoint(branch_info.project_id, branch_info.endpoint_id),
+        ):
+            try:
+                logger.info(cleanup())
+            except Exception as e:
+                logger.error(f"Error releasing branch {branch_info.id}: {e}")
+        try:
+            logger.info(self._delete_branch(branch_info.project_id, branch_info.id))
+        except Exception as e:
+            # Left active in the ledger, the reaper retries it
+            logger.error(f"Error releasing branch {branch_info.id}: {e}")
+        else:
+            if self.ledger is not None:
+                self.ledger.settle(branch_info.id, BranchState.released)
+
+    @span("neon.promote")
     def promote(
         self, role_name: str, project_id: str, endpoint_id: str, branch_id: str
+    ):
+        try:
+            self._promote(role_name, project_id, endpoint_id, branch_id)
+        finally:
+            # pooled branches were forked from the old default, replace them
+            if self.pool is not None:
+                self.pool.unlease(branch_id)
+                self.pool.retire(project_id)
+                self.pool.notify()
+
+    def _promote(
+        self, role_name: str, project_id: str, endpoint_id: str, branch_id: str
     ):
         # remove role
         logger.info(self._delete_role(project_id, branch_id, role_name))
@@ -327,10 +574,66 @@ class CustomNeonAPI:
         # remove endpoint
         logger.info(self._delete_endpoint(project_id, endpoint_id))
 
-        # promote branch
-        logger.info(self._promote_to_main(project_id, branch_id))
-
-        # remove old main branch?
+        # Move the default branch forward to the feature branch. The old state is
+        # kept as a childless backup branch the reaper deletes after retention.
+        default_branch_id = self._current_default_id(project_id)
+        backup = None
+        if default_branch_id is not None and default_branch_id != branch_id:
+            try:
+                backup = self._restore_branch(project_id, default_branch_id, branch_id)
+            except (NeonAPIError, WaitFailed) as e:
+                logger.warning(f"Could not restore {default_branch_id} from {branch_id}: {e}")
+
+        if backup is not None:
+            if self.ledger is not None:
+                self.ledger.supersede(project_id, backup.id, backup.name)
+            # Its data now lives in the default branch
+            try:
+                logger.info(self._delete_branch(project_id, branch_id))
+            except Exception as e:
+                # Still active in the ledger, the reaper deletes it once the job is over
+                logger.error(f"Error deleting promoted branch {branch_id}: {e}")
+            else:
+                if self.ledger is not None:
+                    self.ledger.settle(branch_id, BranchState.released)
+        else:
+            # promote branch
+            logger.info(self._promote_to_main(project_id, branch_id))
+            if self.projects is not None:
+                self.projects.update(project_id, default_branch_id=branch_id)
+            if self.ledger is not None:
+                self.ledger.settle(branch_id, BranchState.promoted)
+                if default_branch_id is not None and default_branch_id != branch_id:
+                    self.ledger.supersede(project_id, default_branch_id, None)
+
+    def _restore_branch(self, proj_id: str, branch_id: str, source_branch_id: str) -> Branch1:
+        """Give a branch the data of another, returning the backup of its old state"""
+        backup_name = f"backup-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+        res = self._http(
+            "POST",
+            f"/projects/{proj_id}/branches/{branch_id}/restore",
+            # Required when the branch has children, which move to the backup
+            json={"source_branch_id": source_branch_id, "preserve_under_name": backup_name},
+        )
+        if not 200 <= res.status_code <= 299:
+            raise NeonAPIError(res.text)
+        operation_ids = [op["id"] for op in res.json().get("operations", [])]
+        if operation_ids and not self._wait_for_operations(proj_id, operation_ids):
+            raise WaitFailed(f"Restore of {branch_id} did not finish")
+
+        backup = next((b for b in self._get_branches(proj_id) if b.name == backup_name), None)
+        if backup is None:
+            raise NeonAPIError(f"Backup branch {backup_name} not found after restore")
+        logger.info(f"Restored {branch_id} from {source_branch_id}, old state in {backup.id}")
+        return backup
+
+    def _current_default_id(self, project_id: str) -> str | None:
+        indexed = self.projects.by_project_id(project_id) if self.projects else []
+        default_branch_id = next((p.default_branch_id for p in indexed if p.default_branch_id), None)
+        if default_branch_id is not None:
+            return default_branch_id
+        default_branch = self._get_default_branch(project_id)
+        return default_branch.id if default_branch else None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import threading
+import time
+
+from cc_vibecode.logger import create_logger
+from contextlib import closing
+from pydantic import BaseModel, Field
+
+logger = create_logger("neon_index")
+
+FIELDS = ("name", "project_id", "default_branch_id", "owner_role", "updated_at")
+
+
+class NeonProject(BaseModel):
+    # Our project name, not necessarily the Neon project's
+    name: str
+    project_id: str
+    default_branch_id: str | None = None
+    owner_role: str | None = None
+    updated_at: float = Field(default_factory=time.time)
+
+
+class ProjectIndex:
+    """Our project names mapped to their Neon project, persisted in SQLite
+
+    Everything is loaded into memory at startup, so lookups never touch
+    the disk or the Neon API; writes go through to the database.
+    """
+
+    def __init__(self, path: str = "cache/neon_projects.db"):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS projects (
+                    name TEXT PRIMARY KEY,
+                    project_id TEXT NOT NULL,
+                    default_branch_id TEXT,
+                    owner_role TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            rows = db.execute(f"SELECT {', '.join(FIELDS)} FROM projects").fetchall()
+        self._projects = {
+            row[0]: NeonProject(**dict(zip(FIELDS, row))) for row in rows
+        }
+        logger.info(f"Loaded {len(self._projects)} indexed Neon projects")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, name: str) -> NeonProject | None:
+        with self._lock:
+            return self._projects.get(name)
+
+    def by_project_id(self, project_id: str) -> list[NeonProject]:
+        with self._lock:
+            return [p for p in self._projects.values() if p.project_id == project_id]
+
+    def put(self, project: NeonProject):
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                f"INSERT OR REPLACE INTO projects ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?)",
+                tuple(getattr(project, field) for field in FIELDS),
+            )
+            self._projects[project.name] = project
+
+    def update(self, project_id: str, **fields):
+        """Record what we learned about a Neon project, e.g. a new default branch"""
+        for project in self.by_project_id(project_id):
+            if all(getattr(project, field) == value for field, value in fields.items()):
+                continue
+            self.put(project.model_copy(update={**fields, "updated_at": time.time()}))
+
+    def forget(self, name: str):
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute("DELETE FROM projects WHERE name = ?", (name,))
+            if self._projects.pop(name, None) is not None:
+                logger.info(f"Dropped {name} from the Neon project index")
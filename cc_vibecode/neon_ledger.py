@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+import time
+
+from cc_vibecode.logger import create_logger
+from contextlib import closing
+from enum import Enum
+from pydantic import BaseModel
+
+logger = create_logger("neon_ledger")
+
+FIELDS = (
+    "branch_id",
+    "project_id",
+    "name",
+    "owner",
+    "endpoint_id",
+    "role",
+    "state",
+    "created_at",
+    "updated_at",
+)
+
+
+class BranchState(str, Enum):
+    # Created for a job or the pool, not yet promoted or released
+    active = "active"
+    # The project's default branch
+    promoted = "promoted"
+    # A former default branch or the backup of one, kept until the retention policy lets it go
+    superseded = "superseded"
+    released = "released"
+    reaped = "reaped"
+
+
+class LedgerEntry(BaseModel):
+    branch_id: str
+    project_id: str
+    name: str | None = None
+    # Job id, "pool" for pooled bundles, None when run outside the job queue
+    owner: str | None = None
+    endpoint_id: str | None = None
+    role: str | None = None
+    state: BranchState = BranchState.active
+    created_at: float
+    updated_at: float
+
+
+class BranchLedger:
+    """Every Neon branch we created and what became of it, persisted in SQLite
+
+    A branch is recorded as soon as Neon returns it, before its endpoint
+    and role exist, so a fork that fails halfway or a server that dies
+    mid-job still leaves a trace for the reaper.
+    """
+
+    def __init__(self, path: str = "cache/neon_ledger.db"):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS branches (
+                    branch_id TEXT PRIMARY KEY,
+                    project_id TEXT NOT NULL,
+                    name TEXT,
+                    owner TEXT,
+                    endpoint_id TEXT,
+                    role TEXT,
+                    state TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, project_id: str, branch_id: str, name: str, owner: str | None):
+        now = time.time()
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO branches (branch_id, project_id, name, owner, state, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (branch_id, project_id, name, owner, BranchState.active.value, now, now),
+            )
+
+    def attach(self, branch_id: str, endpoint_id: str | None = None, role: str | None = None):
+        """Note the endpoint or role created for a recorded branch"""
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "UPDATE branches SET endpoint_id = COALESCE(?, endpoint_id), "
+                "role = COALESCE(?, role), updated_at = ? WHERE branch_id = ?",
+                (endpoint_id, role, time.time(), branch_id),
+            )
+
+    def claim(self, branch_id: str, owner: str | None):
+        """Hand a pooled branch over to a job"""
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "UPDATE branches SET owner = ?, updated_at = ? WHERE branch_id = ?",
+                (owner, time.time(), branch_id),
+            )
+
+    def settle(self, branch_id: str, state: BranchState):
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "UPDATE branches SET state = ?, updated_at = ? WHERE branch_id = ?",
+                (state.value, time.time(), branch_id),
+            )
+
+    def supersede(self, project_id: str, branch_id: str, name: str | None):
+        """Record a former default branch, or the backup of one"""
+        now = time.time()
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR IGNORE INTO branches (branch_id, project_id, name, state, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (branch_id, project_id, name, BranchState.superseded.value, now, now),
+            )
+            db.execute(
+                "UPDATE branches SET state = ?, updated_at = ? WHERE branch_id = ?",
+                (BranchState.superseded.value, now, branch_id),
+            )
+
+    def entries(self, *states: BranchState) -> list[LedgerEntry]:
+        with self._lock, closing(self._connect()) as db:
+            rows = db.execute(
+                f"SELECT {', '.join(FIELDS)} FROM branches WHERE state IN ({', '.join('?' * len(states))}) "
+                "ORDER BY created_at",
+                tuple(state.value for state in states),
+            ).fetchall()
+        return [LedgerEntry(**dict(zip(FIELDS, row))) for row in rows]
+
+    def prune(self, before: float) -> int:
+        """Forget branches released or reaped before a timestamp"""
+        with self._lock, closing(self._connect()) as db, db:
+            cursor = db.execute(
+                "DELETE FROM branches WHERE state IN (?, ?) AND updated_at < ?",
+                (BranchState.released.value, BranchState.reaped.value, before),
+            )
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} settled branches from the ledger")
+        return cursor.rowcount
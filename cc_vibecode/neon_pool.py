@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from cc_vibecode.blocking import run_blocking
+from cc_vibecode.logger import create_logger
+from cc_vibecode.neon import BranchInfo, CustomNeonAPI
+from pydantic import BaseModel, Field
+
+logger = create_logger("neon_pool")
+
+# Ledger owner of bundles waiting in the pool
+POOL_OWNER = "pool"
+
+
+class PooledBranch(BaseModel):
+    info: BranchInfo
+    # Default branch the bundle was forked from; bundles go stale once it changes
+    parent_id: str
+    created_at: float = Field(default_factory=time.time)
+
+
+class NeonBranchPool:
+    """Keeps ready-to-use branch + endpoint + role bundles per Neon project"""
+
+    def __init__(
+        self,
+        neon: CustomNeonAPI,
+        size: int = 1,
+        ttl: int = 3600,
+        interval: int = 30,
+    ):
+        self.neon = neon
+        self.size = size
+        self.ttl = ttl
+        self.interval = interval
+        self._bundles: dict[str, list[PooledBranch]] = {}
+        # Watched project -> time of its latest fork
+        self._projects: dict[str, float] = {}
+        # Bundles whose parent's data changed under them, released on the next refill
+        self._retired: list[PooledBranch] = []
+        # Bumped by retire, so bundles still being built when it ran are retired too
+        self._generations: dict[str, int] = {}
+        # Branch handed to a job -> (its project, handed out at). Busy projects are
+        # not refilled: promote would retire what refill makes meanwhile.
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._wake = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def watch(self, project_id: str):
+        """Keep the pool of a project warm until it goes ttl without a fork"""
+        with self._lock:
+            self._projects[project_id] = time.time()
+
+    def lease(self, project_id: str, branch_id: str):
+        """Mark a project busy until its forked branch is promoted or released"""
+        with self._lock:
+            self._leases[branch_id] = (project_id, time.time())
+
+    def unlease(self, branch_id: str):
+        with self._lock:
+            self._leases.pop(branch_id, None)
+
+    def _busy(self) -> set[str]:
+        # A job that died without releasing its branch holds the project for ttl at most
+        now = time.time()
+        with self._lock:
+            return {p for p, leased_at in self._leases.values() if now - leased_at <= self.ttl}
+
+    def _take_idle(self) -> list[PooledBranch]:
+        """Stop watching projects nobody forked within ttl, returning their bundles"""
+        now = time.time()
+        with self._lock:
+            idle = [p for p, forked_at in self._projects.items() if now - forked_at > self.ttl]
+            bundles = []
+            for project_id in idle:
+                logger.info(f"No fork of {project_id} in {self.ttl}s, emptying its pool")
+                del self._projects[project_id]
+                bundles.extend(self._bundles.pop(project_id, []))
+        return bundles
+
+    def acquire(self, project_id: str, parent_id: str) -> BranchInfo | None:
+        """Take a bundle forked from the current default branch, if one is ready"""
+        with self._lock:
+            bundles = self._bundles.get(project_id, [])
+            for bundle in bundles:
+                if bundle.parent_id == parent_id and not self._expired(bundle):
+                    bundles.remove(bundle)
+                    logger.info(f"Handing out pooled branch {bundle.info.id}")
+                    return bundle.info
+        logger.info(f"No pooled branch ready for project {project_id}")
+        return None
+
+    def retire(self, project_id: str):
+        """Stop handing out a project's bundles, e.g. once its default branch was restored"""
+        with self._lock:
+            self._retired.extend(self._bundles.pop(project_id, []))
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+
+    def holds(self, branch_id: str) -> bool:
+        with self._lock:
+            bundles = [b for bs in self._bundles.values() for b in bs] + self._retired
+            return any(b.info.id == branch_id for b in bundles)
+
+    def _expired(self, bundle: PooledBranch) -> bool:
+        return time.time() - bundle.created_at > self.ttl
+
+    def _take_stale(self, project_id: str, parent_id: str | None) -> list[PooledBranch]:
+        with self._lock:
+            bundles = self._bundles.get(project_id, [])
+            stale = [
+                b for b in bundles if b.parent_id != parent_id or self._expired(b)
+            ]
+            self._bundles[project_id] = [b for b in bundles if b not in stale]
+        return stale
+
+    def refill(self):
+        """Reap stale bundles and top every watched project back up to size"""
+        idle = self._take_idle()
+        with self._lock:
+            projects = list(self._projects)
+            retired, self._retired = self._retired, []
+        busy = self._busy()
+
+        for bundle in retired + idle:
+            logger.info(f"Releasing pooled branch {bundle.info.id}")
+            self.neon.release(bundle.info)
+
+        for project_id in projects:
+            if project_id in busy:
+                logger.debug(f"Not refilling the pool of {project_id} while a job uses it")
+                continue
+            try:
+                default_branch = self.neon._get_default_branch(project_id)
+                parent_id = default_branch.id if default_branch else None
+                if parent_id is not None and self.neon.projects is not None:
+                    # Forks read the default branch from the index
+                    self.neon.projects.update(project_id, default_branch_id=parent_id)
+
+                for bundle in self._take_stale(project_id, parent_id):
+                    logger.info(f"Reaping stale pooled branch {bundle.info.id}")
+                    self.neon.release(bundle.info)
+
+                if parent_id is None:
+                    continue
+
+                with self._lock:
+                    missing = self.size - len(self._bundles.get(project_id, []))
+                    generation = self._generations.get(project_id, 0)
+                for _ in range(missing):
+                    name = f"pool-{uuid.uuid4().hex[:8]}"
+                    info = self.neon._provision(project_id, name, owner=POOL_OWNER)
+                    bundle = PooledBranch(info=info, parent_id=parent_id)
+                    with self._lock:
+                        if self._generations.get(project_id, 0) != generation:
+                            self._retired.append(bundle)
+                            break
+                        self._bundles.setdefault(project_id, []).append(bundle)
+                    logger.info(f"Added branch {info.id} to the pool of {project_id}")
+            except Exception as e:
+                logger.error(f"Error refilling pool for {project_id}: {e}")
+
+    def notify(self):
+        """Refill now instead of waiting for the next interval, safe from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def drain(self):
+        """Release every pooled bundle, used on shutdown"""
+        with self._lock:
+            bundles = [b for bs in self._bundles.values() for b in bs] + self._retired
+            self._bundles.clear()
+            self._retired = []
+        for bundle in bundles:
+            self.neon.release(bundle.info)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        while True:
+            self._wake.clear()
+            await run_blocking(self.refill)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+
+from cc_vibecode.blocking import run_blocking
+from cc_vibecode.jobs import JobQueue
+from cc_vibecode.logger import create_logger
+from cc_vibecode.metrics import metrics, span
+from cc_vibecode.neon import CustomNeonAPI
+from cc_vibecode.neon_ledger import BranchLedger, BranchState, LedgerEntry
+from cc_vibecode.neon_pool import POOL_OWNER
+from collections import defaultdict
+from pydantic import BaseModel, Field
+
+logger = create_logger("neon_reaper")
+
+
+class ReapedBranch(BaseModel):
+    project_id: str
+    branch_id: str
+    name: str | None = None
+    # orphan or superseded
+    reason: str
+    age_seconds: float
+    # Why a candidate was left alone
+    detail: str | None = None
+
+
+class ReapReport(BaseModel):
+    dry_run: bool
+    started_at: float = Field(default_factory=time.time)
+    finished_at: float | None = None
+    reclaimed: list[ReapedBranch] = Field(default_factory=list)
+    skipped: list[ReapedBranch] = Field(default_factory=list)
+    # Ledger entries whose branch was already gone from Neon
+    forgotten: int = 0
+    errors: list[str] = Field(default_factory=list)
+
+
+class NeonReaper:
+    """Deletes the Neon branches in the ledger that nothing will use again
+
+    An active branch older than orphan_age whose job is no longer running,
+    or which the pool no longer holds, is an orphan: a failed release, or a
+    server restart mid-job. Promotion leaves the default branch's old state
+    in a superseded backup branch; the newest `keep` of a project are kept
+    and the rest go once older than `retention`. Neon does not delete a
+    branch that still has children, so such candidates are reported as
+    skipped until their children are gone.
+    """
+
+    def __init__(
+        self,
+        neon: CustomNeonAPI,
+        ledger: BranchLedger,
+        jobs: JobQueue | None = None,
+        orphan_age: int = 3600,
+        retention: int = 7 * 24 * 3600,
+        keep: int = 2,
+        interval: int = 600,
+        dry_run: bool = False,
+    ):
+        self.neon = neon
+        self.ledger = ledger
+        self.jobs = jobs
+        self.orphan_age = orphan_age
+        self.retention = retention
+        self.keep = keep
+        self.interval = interval
+        self.dry_run = dry_run
+        # Report of the latest sweep
+        self.last: ReapReport | None = None
+        self._lock = threading.Lock()
+
+    def _busy(self, entry: LedgerEntry) -> bool:
+        if entry.owner == POOL_OWNER:
+            return self.neon.pool is not None and self.neon.pool.holds(entry.branch_id)
+        if entry.owner is not None and self.jobs is not None:
+            job = self.jobs.get(entry.owner)
+            return job is not None and not job.done
+        return False
+
+    @span("neon.reap")
+    def sweep(self, dry_run: bool | None = None) -> ReapReport:
+        """Reap orphaned and superseded branches, or only report them when dry_run"""
+        with self._lock:
+            report = ReapReport(dry_run=self.dry_run if dry_run is None else dry_run)
+            by_project: dict[str, list[LedgerEntry]] = defaultdict(list)
+            for entry in self.ledger.entries(BranchState.active, BranchState.superseded):
+                by_project[entry.project_id].append(entry)
+
+            for project_id, entries in by_project.items():
+                try:
+                    self._sweep_project(project_id, entries, report)
+                except Exception as e:
+                    logger.error(f"Error reaping branches of {project_id}: {e}")
+                    report.errors.append(f"{project_id}: {e}")
+
+            if not report.dry_run:
+                self.ledger.prune(report.started_at - self.retention)
+            report.finished_at = time.time()
+            self.last = report
+
+        logger.info(
+            f"Reaper {'would reclaim' if report.dry_run else 'reclaimed'} "
+            f"{len(report.reclaimed)} branches, skipped {len(report.skipped)}, "
+            f"{len(report.errors)} errors"
+        )
+        return report
+
+    def _sweep_project(self, project_id: str, entries: list[LedgerEntry], report: ReapReport):
+        branches = {branch.id: branch for branch in self.neon._get_branches(project_id)}
+        parents = {branch.parent_id for branch in branches.values() if branch.parent_id}
+        superseded = sorted(
+            (e for e in entries if e.state == BranchState.superseded),
+            key=lambda e: e.updated_at,
+            reverse=True,
+        )
+        retained = {e.branch_id for e in superseded[: self.keep]}
+
+        for entry in entries:
+            branch = branches.get(entry.branch_id)
+            if branch is None:
+                # Deleted outside the server, or a release whose response got lost
+                report.forgotten += 1
+                if not report.dry_run:
+                    self.ledger.settle(entry.branch_id, BranchState.released)
+                continue
+            if branch.default:
+                # Promoted without going through the ledger
+                if not report.dry_run:
+                    self.ledger.settle(entry.branch_id, BranchState.promoted)
+                continue
+
+            if entry.state == BranchState.active:
+                age = report.started_at - entry.created_at
+                if age < self.orphan_age or self._busy(entry):
+                    continue
+                reason = "orphan"
+            else:
+                age = report.started_at - entry.updated_at
+                if entry.branch_id in retained or age < self.retention:
+                    continue
+                reason = "superseded"
+
+            reaped = ReapedBranch(
+                project_id=project_id,
+                branch_id=entry.branch_id,
+                name=entry.name or branch.name,
+                reason=reason,
+                age_seconds=round(age, 1),
+            )
+            if branch.protected or branch.id in parents:
+                detail = "protected" if branch.protected else "has child branches"
+                report.skipped.append(reaped.model_copy(update={"detail": detail}))
+                continue
+            if not report.dry_run:
+                try:
+                    self._reap(entry)
+                except Exception as e:
+                    logger.error(f"Error reaping branch {entry.branch_id}: {e}")
+                    report.errors.append(f"{entry.branch_id}: {e}")
+                    continue
+                metrics.inc("neon_branches_reaped_total", reason=reason)
+            report.reclaimed.append(reaped)
+
+    def _reap(self, entry: LedgerEntry):
+        """Delete a branch with the endpoint and role we created on it"""
+        logger.info(f"Reaping branch {entry.branch_id} ({entry.name}, {entry.state.value})")
+        if entry.role is not None:
+            try:
+                self.neon._delete_role(entry.project_id, entry.branch_id, entry.role)
+            except Exception as e:
+                logger.warning(f"Could not delete role {entry.role}: {e}")
+        if entry.endpoint_id is not None:
+            try:
+                self.neon._delete_endpoint(entry.project_id, entry.endpoint_id)
+            except Exception as e:
+                logger.warning(f"Could not delete endpoint {entry.endpoint_id}: {e}")
+        self.neon._delete_branch(entry.project_id, entry.branch_id)
+        self.ledger.settle(entry.branch_id, BranchState.reaped)
+
+    async def run(self):
+        while True:
+            try:
+                await run_blocking(self.sweep)
+            except Exception as e:
+                logger.error(f"Reaper sweep failed: {e}")
+            await asyncio.sleep(self.interval)
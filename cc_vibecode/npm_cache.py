@@ -0,0 +1,163 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+import uuid
+
+from cc_vibecode.logger import create_logger
+from pathlib import Path
+from typing import Any, Dict
+
+logger = create_logger("npm_cache")
+
+# Directories tools rewrite in place (prisma generate); never share their inodes
+MUTABLE_DIRS = [".prisma", os.path.join("@prisma", "client"), ".cache"]
+KEY_FILE = ".cache-key"
+
+
+class NodeModulesCache:
+    """Shared node_modules trees keyed by package-lock.json and the Node version
+
+    mode picks how a cached tree is materialized: "reflink" (copy-on-write),
+    "hardlink", "copy", or "auto" to try them in that order.
+    """
+
+    def __init__(self, root: str = "cache/node_modules", mode: str = "auto"):
+        self.root = os.path.abspath(root)
+        self.mode = mode
+        self._node_version: str | None = None
+
+    def _node(self) -> str:
+        if self._node_version is None:
+            result = subprocess.run(
+                ["node", "--version"], capture_output=True, text=True, check=False
+            )
+            self._node_version = result.stdout.strip() or "unknown"
+        return self._node_version
+
+    def key(self, project_dir: str) -> str | None:
+        lockfile = Path(project_dir) / "package-lock.json"
+        if not lockfile.exists():
+            return None
+        digest = hashlib.sha256(lockfile.read_bytes())
+        digest.update(self._node().encode())
+        return digest.hexdigest()
+
+    def _copy_tree(self, src: str, dest: str, hardlink: bool = True):
+        """Copy a tree with the configured mode; hardlink=False when dest must not share inodes"""
+        modes = ["reflink", "hardlink", "copy"] if self.mode == "auto" else [self.mode]
+        if not hardlink:
+            modes = [mode for mode in modes if mode != "hardlink"] or ["copy"]
+        for mode in modes:
+            if mode == "reflink":
+                command = ["cp", "-a", "--reflink=always", src, dest]
+            elif mode == "hardlink":
+                command = ["cp", "-al", src, dest]
+            else:
+                command = ["cp", "-a", src, dest]
+
+            result = subprocess.run(command, capture_output=True, text=True, check=False)
+            if result.returncode == 0:
+                if mode == "hardlink":
+                    self._unshare_mutable(src, dest)
+                logger.debug(f"Copied {src} to {dest} using {mode}")
+                return
+            shutil.rmtree(dest, ignore_errors=True)
+            logger.debug(f"{mode} copy failed: {result.stderr.strip()}")
+
+        raise RuntimeError(f"Could not copy {src} to {dest}")
+
+    def _unshare_mutable(self, src: str, dest: str):
+        for name in MUTABLE_DIRS:
+            if os.path.isdir(os.path.join(src, name)):
+                shutil.rmtree(os.path.join(dest, name))
+                shutil.copytree(os.path.join(src, name), os.path.join(dest, name), symlinks=True)
+
+    def _run(self, command: list[str], project_dir: str):
+        logger.info(f"Running {' '.join(command)}")
+        subprocess.run(command, cwd=project_dir, check=True)
+
+    def install(self, project_dir: str) -> Dict[str, Any]:
+        """Populate node_modules from the cache, installing and publishing on a miss"""
+        start_time = time.time()
+        key = self.key(project_dir)
+        dest = os.path.join(project_dir, "node_modules")
+
+        if key is None:
+            logger.info("No package-lock.json, installing without cache")
+            self._run(["npm", "install"], project_dir)
+            return {"hit": False, "key": None, "duration": time.time() - start_time}
+
+        entry = os.path.join(self.root, key)
+        meta_path = os.path.join(self.root, f"{key}.json")
+        os.makedirs(self.root, exist_ok=True)
+
+        # Concurrent builds of the same lockfile install once, the rest wait and hit
+        with open(os.path.join(self.root, f"{key}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self._read_key(dest) == key:
+                    hit = True
+                    logger.info("node_modules already matches package-lock.json")
+                elif os.path.isdir(entry):
+                    hit = True
+                    shutil.rmtree(dest, ignore_errors=True)
+                    self._copy_tree(entry, dest)
+                else:
+                    hit = False
+                    if self._read_key(dest) is not None:
+                        # Came from the cache and may share inodes with an entry,
+                        # installing over it would rewrite that entry too
+                        shutil.rmtree(dest, ignore_errors=True)
+                    self._run(["npm", "install"], project_dir)
+                    self._publish(dest, entry, key)
+                    with open(meta_path, "w") as f:
+                        json.dump({"install_seconds": time.time() - start_time}, f)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        if hit:
+            # Regenerate per-project artifacts such as the Prisma client
+            self._run(["npm", "run", "--if-present", "postinstall"], project_dir)
+
+        duration = time.time() - start_time
+        saved = None
+        if hit and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                saved = max(0.0, json.load(f)["install_seconds"] - duration)
+        logger.info(
+            f"node_modules cache {'hit' if hit else 'miss'} for {key[:12]} "
+            f"in {duration:.1f}s"
+            + (f", saved ~{saved:.1f}s" if saved is not None else "")
+        )
+        return {"hit": hit, "key": key, "duration": duration, "saved": saved}
+
+    def _read_key(self, node_modules: str) -> str | None:
+        try:
+            with open(os.path.join(node_modules, KEY_FILE)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write_key(self, node_modules: str, key: str):
+        # A new inode, the old key file may be a hardlink into a cache entry
+        tmp = os.path.join(node_modules, f"{KEY_FILE}.tmp-{uuid.uuid4().hex[:8]}")
+        with open(tmp, "w") as f:
+            f.write(key)
+        os.replace(tmp, os.path.join(node_modules, KEY_FILE))
+
+    def _publish(self, node_modules: str, entry: str, key: str):
+        self._write_key(node_modules, key)
+        # Copy aside and rename so readers never see a half-written entry. No
+        # hardlinks, the workspace keeps changing its node_modules afterwards
+        tmp = f"{entry}.tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            self._copy_tree(node_modules, tmp, hardlink=False)
+            os.rename(tmp, entry)
+            logger.info(f"Published node_modules for {key[:12]}")
+        except Exception as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            logger.error(f"Could not publish node_modules to cache: {e}")
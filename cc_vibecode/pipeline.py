@@ -0,0 +1,85 @@
+import asyncio
+
+from cc_vibecode.blocking import run_blocking
+from cc_vibecode.logger import create_logger
+from typing import Any, Callable
+
+logger = create_logger("pipeline")
+
+
+class Step:
+    """A blocking pipeline step that runs once all of its dependencies are done
+
+    fn is called with the results of deps, in order. undo, if given, is called
+    with the step's result when the graph fails so its resources are released.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        deps: list[str] | None = None,
+        undo: Callable[[Any], Any] | None = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = deps or []
+        self.undo = undo
+
+
+def _undo_later(step: Step, future: asyncio.Future):
+    """Undo a step whose thread is still running once it eventually finishes"""
+    def callback(done: asyncio.Future):
+        if not done.cancelled() and done.exception() is None:
+            logger.info(f"Undoing {step.name} after cancellation")
+            asyncio.ensure_future(run_blocking(step.undo, done.result()))  # type: ignore
+
+    future.add_done_callback(callback)
+
+
+async def run_graph(steps: list[Step]) -> dict[str, Any]:
+    """Run steps concurrently as their dependencies allow
+
+    The first failure cancels every other step and undoes the ones that
+    completed, then re-raises.
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        for dep in step.deps:
+            if dep not in by_name:
+                raise ValueError(f"Step {step.name} depends on unknown step {dep}")
+
+    results: dict[str, Any] = {}
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(step: Step):
+        for dep in step.deps:
+            await tasks[dep]
+        args = [results[dep] for dep in step.deps]
+        future = asyncio.ensure_future(run_blocking(step.fn, *args))
+        try:
+            # Shield so a cancelled step can still be undone when its thread returns
+            results[step.name] = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if step.undo is not None:
+                _undo_later(step, future)
+            raise
+        logger.info(f"Step {step.name} done")
+
+    for step in steps:
+        tasks[step.name] = asyncio.create_task(run(step), name=step.name)
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException as e:
+        logger.error(f"Pipeline failed: {e}")
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for name, result in results.items():
+            if by_name[name].undo is not None:
+                logger.info(f"Undoing {name}")
+                await run_blocking(by_name[name].undo, result)  # type: ignore
+        raise
+
+    return results
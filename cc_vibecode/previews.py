@@ -0,0 +1,202 @@
+import asyncio
+import os
+import threading
+import time
+
+from cc_vibecode.blocking import run_blocking
+from cc_vibecode.logger import create_logger
+from cc_vibecode.npm_cache import NodeModulesCache
+from cc_vibecode.server import start_server_background, stop_server
+from pathlib import Path
+from pydantic import BaseModel
+
+logger = create_logger("previews")
+
+
+class Preview(BaseModel):
+    project: str
+    path: str
+    pid: int | None = None
+    port: int | None = None
+    url: str | None = None
+    running: bool = False
+    # A feature build owns the workspace, so the preview must not be restarted
+    building: bool = False
+    last_access: float
+    rss_bytes: int = 0
+
+
+def _group_rss(pgid: int) -> int:
+    """Resident memory of every process in a process group (npm, next and workers)"""
+    total = 0
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat") as f:
+                # The process name may contain spaces, so split after its closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[2]) != pgid:
+                continue
+            with open(f"/proc/{entry.name}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def _alive(pid: int | None) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+class PreviewManager:
+    """Tracks running dev server previews and evicts idle ones to fit a budget"""
+
+    def __init__(
+        self,
+        npm_cache: NodeModulesCache | None = None,
+        host: str = "localhost",
+        max_previews: int = 5,
+        max_rss_bytes: int = 4 * 1024**3,
+        interval: int = 30,
+    ):
+        self.npm_cache = npm_cache
+        self.host = host
+        self.max_previews = max_previews
+        self.max_rss_bytes = max_rss_bytes
+        self.interval = interval
+        self._previews: dict[str, Preview] = {}
+        self._lock = threading.RLock()
+
+    def start(self, project: str, path: str) -> Preview:
+        """(Re)start the preview of a project, evicting others to make room"""
+        with self._lock:
+            stop_server(path)
+            self._make_room(exclude=project)
+            current = self._previews.get(project)
+            preview = Preview(
+                project=project,
+                path=path,
+                last_access=time.time(),
+                building=current is not None and current.building,
+            )
+            self._previews[project] = preview
+
+        # Installing and booting takes a while, don't block the pool meanwhile
+        port = start_server_background(path, npm_cache=self.npm_cache)
+
+        with self._lock:
+            # hold() or release() may have run while the server booted
+            current = self._previews.get(project, preview)
+            if port is not None:
+                pid = int((Path(path) / ".dev-server.pid").read_text().strip())
+                preview = preview.model_copy(
+                    update={
+                        "pid": pid,
+                        "port": port,
+                        "url": f"http://{self.host}:{port}",
+                        "running": True,
+                    }
+                )
+            preview.building = current.building
+            self._previews[project] = preview
+            return preview
+
+    def get(self, project: str, restart: bool = True) -> Preview | None:
+        """Return a project's preview, lazily restarting it if it was evicted
+
+        Callers pass restart=False while a job owns the workspace, a restart
+        would pull and install into a checkout that is being rebuilt.
+        """
+        with self._lock:
+            preview = self._previews.get(project)
+            if preview is None:
+                return None
+            if not restart or preview.building or (preview.running and _alive(preview.pid)):
+                preview.last_access = time.time()
+                return preview
+            if not os.path.isdir(preview.path):
+                logger.info(f"Workspace of {project} is gone, dropping its preview")
+                del self._previews[project]
+                return None
+
+        logger.info(f"Restarting evicted preview of {project}")
+        return self.start(project, preview.path)
+
+    def stop(self, project: str):
+        with self._lock:
+            preview = self._previews.get(project)
+            if preview is None:
+                return
+            stop_server(preview.path)
+            self._previews[project] = preview.model_copy(
+                update={"pid": None, "port": None, "url": None, "running": False, "rss_bytes": 0}
+            )
+
+    def hold(self, project: str):
+        """Stop a project's preview and keep it down while its workspace is rebuilt"""
+        with self._lock:
+            if project in self._previews:
+                self.stop(project)
+                self._previews[project].building = True
+
+    def release(self, project: str):
+        with self._lock:
+            if project in self._previews:
+                self._previews[project].building = False
+
+    def all(self) -> list[Preview]:
+        with self._lock:
+            self.refresh()
+            return list(self._previews.values())
+
+    def refresh(self):
+        """Update liveness and memory usage of every tracked preview"""
+        with self._lock:
+            for preview in self._previews.values():
+                if preview.running and not _alive(preview.pid):
+                    preview.running = False
+                preview.rss_bytes = _group_rss(preview.pid) if preview.running else 0
+
+    def _running(self) -> list[Preview]:
+        return [p for p in self._previews.values() if p.running]
+
+    def _make_room(self, exclude: str | None = None):
+        """Evict least recently used previews until one more fits the count budget"""
+        self.refresh()
+        for preview in sorted(self._running(), key=lambda p: p.last_access):
+            if len(self._running()) < self.max_previews:
+                break
+            if preview.project != exclude:
+                self._evict(preview, "count budget")
+
+    def enforce(self):
+        """Evict least recently used previews while over the count or memory budget"""
+        with self._lock:
+            self.refresh()
+            for preview in sorted(self._running(), key=lambda p: p.last_access):
+                running = self._running()
+                total_rss = sum(p.rss_bytes for p in running)
+                if len(running) <= self.max_previews and total_rss <= self.max_rss_bytes:
+                    break
+                self._evict(preview, f"{total_rss / 1024**2:.0f} MB in use")
+
+    def _evict(self, preview: Preview, reason: str):
+        logger.info(
+            f"Evicting preview of {preview.project} ({preview.rss_bytes / 1024**2:.0f} MB, {reason})"
+        )
+        self.stop(preview.project)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await run_blocking(self.enforce)
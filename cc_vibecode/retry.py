@@ -0,0 +1,79 @@
+import httpx
+import random
+import requests
+import time
+
+from cc_vibecode.logger import create_logger
+from typing import Any, Callable
+
+logger = create_logger("retry")
+
+# Project locked by a conflicting operation, rate limited, or server side trouble
+RETRY_STATUSES = frozenset({423, 429, 500, 502, 503, 504})
+# Statuses where the server certainly did not act, the only ones a create may retry on
+REJECTED_STATUSES = frozenset({423, 429})
+TRANSPORT_ERRORS = (httpx.TransportError, requests.ConnectionError, requests.Timeout)
+
+
+def backoff_delay(
+    attempt: int, base: float = 0.5, cap: float = 20.0, retry_after: float | None = None
+) -> float:
+    """Exponential backoff with equal jitter, honouring Retry-After when sent"""
+    if retry_after is not None:
+        return min(cap, retry_after)
+    delay = min(cap, base * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _retry_after(response: Any) -> float | None:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _should_retry(
+    attempt: int, max_retries: int, result: Any, what: str, idempotent: bool = True
+) -> float | None:
+    """Return how long to wait before the next attempt, or None to stop
+
+    A request that is not idempotent may already have been applied when the
+    connection drops or the server errors, so it is only retried when it was
+    rejected outright.
+    """
+    if attempt >= max_retries:
+        return None
+    if isinstance(result, BaseException):
+        if not idempotent:
+            return None
+        delay = backoff_delay(attempt)
+        reason = str(result)
+    elif result.status_code in (RETRY_STATUSES if idempotent else REJECTED_STATUSES):
+        delay = backoff_delay(attempt, retry_after=_retry_after(result))
+        reason = f"HTTP {result.status_code}"
+    else:
+        return None
+    logger.info(
+        f"{what} failed ({reason}), retrying in {delay:.1f}s ({attempt + 1}/{max_retries})"
+    )
+    return delay
+
+
+def send_with_retry(
+    send: Callable[[], Any], max_retries: int = 8, what: str = "Request", idempotent: bool = True
+) -> Any:
+    """Call send() until it returns a non-retryable response"""
+    attempt = 0
+    while True:
+        try:
+            result = send()
+        except TRANSPORT_ERRORS as e:
+            result = e
+        delay = _should_retry(attempt, max_retries, result, what, idempotent)
+        if delay is None:
+            if isinstance(result, BaseException):
+                raise result
+            return result
+        time.sleep(delay)
+        attempt += 1
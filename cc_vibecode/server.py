@@ -1,72 +1,162 @@
+import httpx
 import json
 import os
 import signal
+import socket
 import subprocess
+import threading
 import time
 
 from cc_vibecode.logger import create_logger
+from cc_vibecode.metrics import span
+from cc_vibecode.npm_cache import NodeModulesCache
+from cc_vibecode.waiter import WaitFailed, wait_until
 from pathlib import Path
 
 logger = create_logger("server")
 
-def start_server_background(project_dir: str):
-    """Start server in background and store PID"""
-    # Convert to absolute path to avoid issues after chdir
+
+class PortAllocator:
+    """Hands out free preview ports from a range so many dev servers can coexist"""
+
+    def __init__(self, start: int = 3000, end: int = 3999):
+        self.start = start
+        self.end = end
+        self._reserved: set[int] = set()
+        self._lock = threading.Lock()
+
+    def _is_free(self, port: int) -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind(("", port))
+                return True
+            except OSError:
+                return False
+
+    def allocate(self) -> int:
+        with self._lock:
+            for port in range(self.start, self.end + 1):
+                if port not in self._reserved and self._is_free(port):
+                    self._reserved.add(port)
+                    return port
+        raise RuntimeError(f"No free preview port in {self.start}-{self.end}")
+
+    def release(self, port: int):
+        with self._lock:
+            self._reserved.discard(port)
+
+
+ports = PortAllocator(
+    int(os.getenv("PREVIEW_PORT_START", "3000")),
+    int(os.getenv("PREVIEW_PORT_END", "3999")),
+)
+
+
+@span("server.ready")
+def wait_for_server(port: int, process: subprocess.Popen, timeout: int = 120) -> bool:
+    """Wait until the dev server accepts connections and answers HTTP"""
+    def check() -> bool:
+        if process.poll() is not None:
+            raise WaitFailed(f"Server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                pass
+            # Any HTTP response means Next.js is serving, even an error page
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=5)
+            return True
+        except (OSError, httpx.HTTPError):
+            return False
+
+    try:
+        return wait_until(f"dev server on port {port}", check, timeout).ready
+    except WaitFailed as e:
+        logger.error(str(e))
+        return False
+
+@span("server.start")
+def start_server_background(
+    project_dir: str, npm_cache: NodeModulesCache | None = None, port: int | None = None
+) -> int | None:
+    """Start server in background, store PID and return its port once it answers"""
+    # Never chdir: other projects may be building in this process concurrently
     abs_project_dir = os.path.abspath(project_dir)
-    os.chdir(abs_project_dir)
     pid_file = Path(abs_project_dir) / '.dev-server.pid'
+    port_file = Path(abs_project_dir) / '.dev-server.port'
     
     # Setup commands
     # NOTE: Migrations are already applied by the agent during development
     # Running them again causes permission errors and is unnecessary
     commands = [
-        (['git', 'pull', 'origin', 'main'], 'Pull changes'),
-        (['npm', 'install'], 'Install dependencies'),
+        (['git', 'pull', 'origin', 'main'], 'Pull changes', 'server.git_pull'),
     ]
+    if npm_cache is None:
+        commands.append((['npm', 'install'], 'Install dependencies', 'server.npm_install'))
     
     # Run setup commands
-    for cmd, desc in commands:
+    for cmd, desc, name in commands:
         logger.info(f"{desc}...")
-        subprocess.run(cmd, check=True)
+        with span(name):
+            subprocess.run(cmd, cwd=abs_project_dir, check=True)
         logger.info(f"{desc} complete")
+
+    if npm_cache is not None:
+        logger.info("Install dependencies...")
+        with span("server.npm_install"):
+            npm_cache.install(abs_project_dir)
+        logger.info("Install dependencies complete")
     
     # Start server in background
     logger.info("Starting development server in background...")
+    if port is None:
+        port = ports.allocate()
 
     # Redirect output to log file to prevent buffer overflow
     log_file = Path(abs_project_dir) / '.dev-server.log'
     log_handle = open(log_file, 'w')
 
     process = subprocess.Popen(
-        ['npm', 'run', 'dev'],
+        ['npm', 'run', 'dev', '--', '-p', str(port)],
+        cwd=abs_project_dir,
+        env={**os.environ, 'PORT': str(port)},
         stdout=log_handle,
-        stderr=subprocess.STDOUT
+        stderr=subprocess.STDOUT,
+        # Own process group so npm and the next workers it spawns stop together
+        start_new_session=True,
     )
-    
-    # Wait a moment for server to start
-    time.sleep(3)
-    
-    if process.poll() is None:
-        # Store PID in file
-        with open(pid_file, 'w') as f:
-            f.write(str(process.pid))
 
+    # Store PID and port so stop_server can find the server again
+    with open(pid_file, 'w') as f:
+        f.write(str(process.pid))
+    with open(port_file, 'w') as f:
+        f.write(str(port))
+
+    # Return as soon as the server answers instead of sleeping blindly
+    if wait_for_server(port, process):
         logger.info("Server started successfully!")
         logger.info(f"Process ID: {process.pid}")
         logger.info(f"PID saved to: {pid_file}")
         logger.info(f"Server logs: {log_file}")
-        logger.info("Server should be running at http://localhost:3000")
-    else:
-        logger.error("Server failed to start")
-        logger.error(f"Check logs at: {log_file}")
-    
-    return process
+        logger.info(f"Server running at http://localhost:{port}")
+        return port
+
+    logger.error("Server failed to start")
+    logger.error(f"Check logs at: {log_file}")
+    stop_server(abs_project_dir)
+    return None
 
 def stop_server(project_dir: str):
     """Stop the background server using stored PID"""
     # Convert to absolute path for consistency
     abs_project_dir = os.path.abspath(project_dir)
     pid_file = Path(abs_project_dir) / '.dev-server.pid'
+    port_file = Path(abs_project_dir) / '.dev-server.port'
+
+    if port_file.exists():
+        try:
+            ports.release(int(port_file.read_text().strip()))
+        except ValueError:
+            pass
+        port_file.unlink()
 
     if not pid_file.exists():
         logger.debug("No PID file found. Server may not be running.")
@@ -79,18 +169,18 @@ def stop_server(project_dir: str):
         
         logger.info(f"Stopping server (PID: {pid})...")
         
-        # Kill the process
-        os.kill(pid, signal.SIGTERM)
+        # Kill the whole process group started by start_server_background
+        os.killpg(pid, signal.SIGTERM)
         
         # Wait a moment and check if it's dead
         time.sleep(1)
         
         try:
-            # Check if process still exists
-            os.kill(pid, 0)
+            # Check if process group still exists
+            os.killpg(pid, 0)
             # If we're here, process is still alive, force kill
             logger.info("Process still running, forcing shutdown...")
-            os.kill(pid, signal.SIGKILL)
+            os.killpg(pid, signal.SIGKILL)
         except OSError:
             # Process is dead
             pass
@@ -112,7 +202,7 @@ if __name__ == "__main__":
     project_path = '/path/to/project'
     
     # Start server
-    process = start_server_background(project_path)
+    port = start_server_background(project_path)
     
     # Later, to stop:
     # stop_server(project_path)
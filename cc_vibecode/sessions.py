@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+import time
+
+from cc_vibecode.logger import create_logger
+from claude_agent_sdk import ResultMessage
+from contextlib import closing
+from pydantic import BaseModel
+
+logger = create_logger("sessions")
+
+
+class SessionChoice(BaseModel):
+    """The agent session a run should continue, and how"""
+
+    session_id: str
+    # Fork for a new feature so the parent session stays a clean base
+    fork: bool
+    chain_turns: int
+    chain_runs: int
+    started_at: float
+
+
+class SessionStore:
+    """Agent session ids per project and branch, so later features resume them
+
+    A chain of resumed sessions is reset once it has run more than
+    max_turns turns or max_runs features, or is older than max_age seconds,
+    because a long transcript costs more per turn than it saves.
+    """
+
+    def __init__(
+        self,
+        path: str = "cache/sessions.db",
+        max_turns: int = 300,
+        max_runs: int = 10,
+        max_age: int = 7 * 24 * 3600,
+    ):
+        self.path = os.path.abspath(path)
+        self.max_turns = max_turns
+        self.max_runs = max_runs
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    project TEXT NOT NULL,
+                    branch TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    chain_turns INTEGER NOT NULL,
+                    chain_runs INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (project, branch)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def pick(self, project: str, branch: str) -> SessionChoice | None:
+        """Session to resume for a feature: the branch's own, else the project's latest"""
+        with self._lock, closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT session_id, chain_turns, chain_runs, started_at, branch = ? "
+                "FROM sessions WHERE project = ? "
+                "ORDER BY branch = ? DESC, updated_at DESC LIMIT 1",
+                (branch, project, branch),
+            ).fetchone()
+        if row is None:
+            return None
+
+        session_id, chain_turns, chain_runs, started_at, same_branch = row
+        if chain_turns >= self.max_turns:
+            reason = f"{chain_turns} turns"
+        elif chain_runs >= self.max_runs:
+            reason = f"{chain_runs} runs"
+        elif time.time() - started_at > self.max_age:
+            reason = f"{(time.time() - started_at) / 3600:.0f}h old"
+        else:
+            return SessionChoice(
+                session_id=session_id,
+                fork=not same_branch,
+                chain_turns=chain_turns,
+                chain_runs=chain_runs,
+                started_at=started_at,
+            )
+
+        logger.info(f"Resetting session of {project} ({reason})")
+        return None
+
+    def record(
+        self, project: str, branch: str, result: ResultMessage, parent: SessionChoice | None
+    ):
+        """Remember the session a run ended in, extending its parent's chain"""
+        now = time.time()
+        with self._lock, closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    project,
+                    branch,
+                    result.session_id,
+                    (parent.chain_turns if parent else 0) + result.num_turns,
+                    (parent.chain_runs if parent else 0) + 1,
+                    parent.started_at if parent else now,
+                    now,
+                ),
+            )
+
+    def forget(self, project: str, branch: str | None = None):
+        with self._lock, closing(self._connect()) as db, db:
+            if branch is None:
+                db.execute("DELETE FROM sessions WHERE project = ?", (project,))
+            else:
+                db.execute(
+                    "DELETE FROM sessions WHERE project = ? AND branch = ?", (project, branch)
+                )
@@ -0,0 +1,118 @@
+import os
+import shutil
+import threading
+import time
+
+from cc_vibecode.git import CustomGitAPI
+from cc_vibecode.logger import create_logger
+from cc_vibecode.metrics import span
+from cc_vibecode.npm_cache import NodeModulesCache
+from typing import Any, Dict
+
+logger = create_logger("template")
+
+
+class TemplateCache:
+    """Local checkout of the project template that new workspaces are copied from
+
+    A new project starts from a copy of this checkout instead of asking
+    GitHub to copy the template and cloning the result. The remote is then
+    created empty and the copy pushed to it while the agent works. The
+    checkout's node_modules are installed once so the first preview of a
+    new project hits the node_modules cache.
+    """
+
+    def __init__(
+        self,
+        git: CustomGitAPI,
+        url: str,
+        root: str = "cache/template",
+        npm_cache: NodeModulesCache | None = None,
+        max_age: int = 3600,
+    ):
+        self.git = git
+        self.url = url
+        self.root = os.path.abspath(root)
+        self.checkout = os.path.join(self.root, "checkout")
+        self.npm_cache = npm_cache
+        self.max_age = max_age
+        self._fetched = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Clone the template, or fetch it when the checkout is older than max_age"""
+        if not os.path.isdir(os.path.join(self.checkout, ".git")):
+            shutil.rmtree(self.checkout, ignore_errors=True)
+            os.makedirs(self.root, exist_ok=True)
+            # Full history: publish pushes it into an empty repository, which
+            # rejects shallow pushes, and a partial clone would fetch missing
+            # objects from the new, empty origin
+            result = self.git.clone(self.url, destination=self.checkout, depth=0, filter="")
+            if not result["success"]:
+                raise ValueError(f"Could not clone template {self.url}, {result['stderr']}")
+        elif time.time() - self._fetched > self.max_age:
+            before = self._head()
+            self._fetched = time.time()
+            for command in (
+                ["git", "fetch", "--prune", "origin"],
+                ["git", "reset", "--hard", "origin/HEAD"],
+            ):
+                result = self.git.run_git_command(command, cwd=self.checkout)
+                if not result["success"]:
+                    # A stale template is still a valid starting point
+                    logger.warning(f"Could not refresh template: {result['stderr']}")
+                    return
+            if self._head() == before:
+                return
+        else:
+            return
+
+        self._fetched = time.time()
+        logger.info(f"Template {self.url} at {(self._head() or '?')[:12]}")
+        if self.npm_cache is not None:
+            try:
+                self.npm_cache.install(self.checkout)
+            except Exception as e:
+                logger.error(f"Could not pre-install template node_modules: {e}")
+
+    def warm(self):
+        """Prepare the checkout ahead of the first new project"""
+        with self._lock:
+            self._refresh()
+
+    def _head(self) -> str | None:
+        result = self.git.run_git_command(["git", "rev-parse", "HEAD"], cwd=self.checkout)
+        return result["stdout"].strip() if result["success"] else None
+
+    @span("template.materialize")
+    def materialize(self, url: str, dest: str) -> Dict[str, Any]:
+        """Create a workspace for a new project at dest whose origin is url"""
+        with self._lock:
+            self._refresh()
+            if os.path.exists(dest):
+                shutil.rmtree(dest)
+            # node_modules come from the node_modules cache when the preview starts
+            shutil.copytree(
+                self.checkout,
+                dest,
+                symlinks=True,
+                ignore=shutil.ignore_patterns("node_modules"),
+            )
+
+        for command in (
+            ["git", "remote", "set-url", "origin", url],
+            ["git", "checkout", "-q", "-B", "main"],
+        ):
+            result = self.git.run_git_command(command, cwd=dest)
+            if not result["success"]:
+                return result
+        logger.info(f"Materialized {dest} from the local template")
+        return {**result, "materialized": True}
+
+    @span("template.publish")
+    def publish(self, url: str, path: str) -> Dict[str, Any]:
+        """Create the empty remote of a materialized workspace and push it"""
+        created = self.git.create_github_repo(url)
+        if not created["success"]:
+            return {**created, "stderr": created["message"]}
+        return self.git.run_git_command(["git", "push", "-q", "-u", "origin", "HEAD:main"], cwd=path)
@@ -0,0 +1,100 @@
+import time
+
+from cc_vibecode.logger import create_logger
+from pydantic import BaseModel
+from typing import Callable
+
+logger = create_logger("waiter")
+
+
+class WaitResult(BaseModel):
+    name: str
+    ready: bool
+    elapsed: float
+    attempts: int
+
+
+class WaitFailed(Exception):
+    """Raised by a check when the resource can never become ready"""
+
+
+class Backoff:
+    """Poll intervals that start fast and grow towards max_interval"""
+
+    def __init__(self, initial: float = 0.2, factor: float = 1.6, max_interval: float = 3.0):
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+
+    def intervals(self):
+        interval = self.initial
+        while True:
+            yield interval
+            interval = min(self.max_interval, interval * self.factor)
+
+
+DEFAULT_BACKOFF = Backoff()
+
+
+def _report(result: WaitResult) -> WaitResult:
+    if result.ready:
+        logger.info(
+            f"{result.name} ready after {result.elapsed:.2f}s ({result.attempts} polls)"
+        )
+    else:
+        logger.error(
+            f"Timed out waiting for {result.name} after {result.elapsed:.2f}s "
+            f"({result.attempts} polls)"
+        )
+    return result
+
+
+def wait_all(
+    checks: dict[str, Callable[[], bool]],
+    timeout: float = 60,
+    backoff: Backoff = DEFAULT_BACKOFF,
+) -> dict[str, WaitResult]:
+    """Poll several checks together until each returns True or the deadline passes"""
+    start_time = time.monotonic()
+    pending = dict(checks)
+    attempts = {name: 0 for name in checks}
+    results: dict[str, WaitResult] = {}
+
+    for interval in backoff.intervals():
+        for name, check in list(pending.items()):
+            attempts[name] += 1
+            if check():
+                del pending[name]
+                results[name] = _report(
+                    WaitResult(
+                        name=name,
+                        ready=True,
+                        elapsed=time.monotonic() - start_time,
+                        attempts=attempts[name],
+                    )
+                )
+        elapsed = time.monotonic() - start_time
+        if not pending or elapsed >= timeout:
+            break
+        time.sleep(min(interval, timeout - elapsed))
+
+    for name in pending:
+        results[name] = _report(
+            WaitResult(
+                name=name,
+                ready=False,
+                elapsed=time.monotonic() - start_time,
+                attempts=attempts[name],
+            )
+        )
+    return results
+
+
+def wait_until(
+    name: str,
+    check: Callable[[], bool],
+    timeout: float = 60,
+    backoff: Backoff = DEFAULT_BACKOFF,
+) -> WaitResult:
+    return wait_all({name: check}, timeout=timeout, backoff=backoff)[name]
+
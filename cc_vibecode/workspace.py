@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+
+from cc_vibecode.git import CustomGitAPI
+from cc_vibecode.logger import create_logger
+from cc_vibecode.server import stop_server
+from cc_vibecode.template import TemplateCache
+from typing import Any, Dict
+
+logger = create_logger("workspace")
+
+
+class WorkspaceManager:
+    """Hands out one isolated directory per project under a shared root"""
+
+    def __init__(
+        self,
+        git: CustomGitAPI,
+        root: str = "workspaces",
+        reuse: bool = True,
+        max_bytes: int = 20 * 1024**3,
+        template: TemplateCache | None = None,
+    ):
+        self.git = git
+        self.template = template
+        self.root = os.path.abspath(root)
+        self.reuse = reuse
+        self.max_bytes = max_bytes
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _slug(self, project_name: str) -> str:
+        # Keep directory names filesystem safe and inside the root
+        slug = re.sub(r"[^A-Za-z0-9._-]", "-", project_name).strip(".-")
+        if not slug:
+            raise ValueError(f"Invalid project name: {project_name!r}")
+        return slug
+
+    def key(self, project_name: str, url: str) -> str:
+        """Name of a project's workspace; the repo hash keeps same-named projects apart"""
+        digest = hashlib.sha256(url.encode()).hexdigest()[:8]
+        return f"{self._slug(project_name)}-{digest}"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, self._slug(key))
+
+    def lock(self, key: str) -> asyncio.Lock:
+        """Features of one project build on each other, so they run one at a time"""
+        key = self._slug(key)
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _origin(self, path: str) -> str | None:
+        if not os.path.isdir(os.path.join(path, ".git")):
+            return None
+        result = self.git.run_git_command(
+            ["git", "remote", "get-url", "origin"], cwd=path
+        )
+        return result["stdout"].strip() if result["success"] else None
+
+    def _refresh(self, path: str) -> Dict[str, Any]:
+        """Bring an existing checkout up to date, keeping ignored files like node_modules"""
+        result = self.git.run_git_command(["git", "fetch", "--prune", "origin"], cwd=path)
+        if not result["success"]:
+            return result
+
+        head = self.git.run_git_command(
+            ["git", "rev-parse", "--abbrev-ref", "origin/HEAD"], cwd=path
+        )
+        remote_ref = head["stdout"].strip() if head["success"] else "origin/main"
+        local_branch = remote_ref.split("/", 1)[-1]
+
+        for command in (
+            ["git", "checkout", "-f", "-B", local_branch, remote_ref],
+            ["git", "reset", "--hard", remote_ref],
+            # No -x: node_modules, .next and the Prisma client survive
+            ["git", "clean", "-fd"],
+        ):
+            result = self.git.run_git_command(command, cwd=path)
+            if not result["success"]:
+                return result
+        return result
+
+    def prepare(self, url: str, path: str, new: bool = False) -> Dict[str, Any]:
+        """Reuse the checkout at path if it tracks url, otherwise clone afresh
+
+        A new project whose remote has no commits yet is copied from the
+        local template instead; the result then has "materialized" set and
+        the caller must publish it.
+        """
+        stop_server(path)
+
+        if new and self.template is not None and self.git.remote_head(url) is None:
+            result = self.template.materialize(url, path)
+            if result["success"]:
+                self.evict(keep=path)
+            return result
+
+        if self.reuse and self._origin(path) == url:
+            logger.info(f"Reusing workspace {path}")
+            result = self._refresh(path)
+            if result["success"]:
+                os.utime(path)
+                return result
+            logger.info(f"Could not refresh {path}, cloning again")
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+        result = self.git.clone(url, destination=path)
+        if result["success"]:
+            self.evict(keep=path)
+        return result
+
+    def _disk_usage(self, path: str) -> int:
+        total = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_blocks * 512
+                except OSError:
+                    pass
+        return total
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """Remove least recently used workspaces until the root fits in max_bytes"""
+        if not os.path.isdir(self.root):
+            return []
+
+        workspaces = []
+        for entry in os.scandir(self.root):
+            if entry.is_dir(follow_symlinks=False):
+                workspaces.append(
+                    (entry.stat().st_mtime, entry.path, self._disk_usage(entry.path))
+                )
+
+        total = sum(size for _, _, size in workspaces)
+        evicted = []
+        for _, path, size in sorted(workspaces):
+            if total <= self.max_bytes:
+                break
+            lock = self._locks.get(os.path.basename(path))
+            if path == keep or (lock and lock.locked()):
+                continue
+            logger.info(f"Evicting workspace {path} ({size / 1024**2:.0f} MB)")
+            stop_server(path)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted.append(path)
+
+        return evicted
@@ -17,13 +17,27 @@ const ProjectViewer: React.FC<ProjectViewerProps> = ({ project, username, onBack
   const [processing, setProcessing] = useState(false);
   const [currentFeature, setCurrentFeature] = useState<Feature | null>(null);
   const [iframeKey, setIframeKey] = useState(0);
+  const [previewUrl, setPreviewUrl] = useState<string | undefined>(project.previewUrl);
+  const gitUrl = `git@github.com:${project.username}/${project.name}.git`;
   const iframeRef = useRef<HTMLIFrameElement>(null);
   const overlayRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
     loadFeatures();
+    loadPreview();
   }, [project.id]);
 
+  const loadPreview = async () => {
+    try {
+      const preview = await api.previews.get(project.name, gitUrl);
+      if (preview.url) {
+        setPreviewUrl(preview.url);
+      }
+    } catch {
+      // No preview yet, keep the default
+    }
+  };
+
   const loadFeatures = async () => {
     try {
       const data = await api.features.list(project.id);
@@ -58,9 +72,6 @@ const ProjectViewer: React.FC<ProjectViewerProps> = ({ project, username, onBack
       ? project.name.toLowerCase().replace(/\s+/g, '_')
       : `${title.toLowerCase().replace(/\s+/g, '_')}_${Date.now()}`;
 
-    // Always use tmp - gets deleted and recreated each time anyway
-    const dirPath = 'tmp';
-
     const feature: Feature = {
       id: Date.now().toString(),
       projectId: project.id,
@@ -78,15 +89,11 @@ const ProjectViewer: React.FC<ProjectViewerProps> = ({ project, username, onBack
     localStorage.setItem(`features_${project.id}`, JSON.stringify(updatedFeatures));
 
     try {
-      // Construct git URL and project name
-      const gitUrl = `git@github.com:${project.username}/${project.name}.git`;
-
       // Call execute endpoint
       const result = await api.execute({
         url: gitUrl,
         projectName: project.name,  // Use project name for Neon
         branchName,
-        dirPath,
         prompt,
         first: features.length === 0 // first is true if this is the first feature
       });
@@ -99,8 +106,11 @@ const ProjectViewer: React.FC<ProjectViewerProps> = ({ project, username, onBack
       setFeatures(finalFeatures);
       localStorage.setItem(`features_${project.id}`, JSON.stringify(finalFeatures));
 
-      // Reload iframe to show updated content
+      // Point the iframe at the project's dev server and reload it
       if (result.success) {
+        if (result.previewUrl) {
+          setPreviewUrl(result.previewUrl);
+        }
         setIframeKey(prev => prev + 1);
       }
     } catch (error) {
@@ -118,8 +128,8 @@ const ProjectViewer: React.FC<ProjectViewerProps> = ({ project, username, onBack
   };
 
   const getPreviewUrl = () => {
-    // Use the project's preview URL or a default local server
-    return project.previewUrl || 'http://localhost:3000';
+    // Use the latest preview URL from the backend or a default local server
+    return previewUrl || 'http://localhost:3000';
   };
 
   return (
@@ -1,19 +1,75 @@
 import axios from 'axios';
-import { ExecuteRequest, ExecuteResponse, Project, Feature } from '../types';
+import { ExecuteRequest, ExecuteResponse, Job, JobEvent, Preview, Project, Feature } from '../types';
 
 const API_BASE_URL = '/api';
 
-// Create axios instance with extended timeout for long-running agent tasks
-const axiosInstance = axios.create({
-  baseURL: API_BASE_URL,
-  timeout: 600000, // 10 minutes for agent execution
-});
+// How often to poll a queued job for its status
+const JOB_POLL_INTERVAL = 3000;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
 
 export const api = {
-  // Execute endpoint - will be implemented as FastAPI endpoint later
+  // Execute endpoint - queues a job and polls it until it finishes
   execute: async (request: ExecuteRequest): Promise<ExecuteResponse> => {
-    const response = await axiosInstance.post<ExecuteResponse>('/execute', request);
-    return response.data;
+    const response = await axios.post<ExecuteResponse>(`${API_BASE_URL}/execute`, request);
+    const { jobId } = response.data;
+    if (!response.data.success || !jobId) {
+      return response.data;
+    }
+
+    let job = await api.jobs.get(jobId);
+    while (job.status === 'queued' || job.status === 'running') {
+      await sleep(JOB_POLL_INTERVAL);
+      job = await api.jobs.get(jobId);
+    }
+
+    return {
+      success: job.status === 'succeeded',
+      message: job.message,
+      previewUrl: job.previewUrl,
+      jobId
+    };
+  },
+
+  jobs: {
+    get: async (jobId: string): Promise<Job> => {
+      const response = await axios.get<Job>(`${API_BASE_URL}/jobs/${jobId}`);
+      return response.data;
+    },
+
+    // Stop the agent and release the job's database branch
+    cancel: async (jobId: string): Promise<Job> => {
+      const response = await axios.post<Job>(`${API_BASE_URL}/jobs/${jobId}/cancel`);
+      return response.data;
+    },
+
+    // Stream a job's phase changes and agent messages; returns a function that stops the stream
+    events: (jobId: string, onEvent: (event: JobEvent) => void): (() => void) => {
+      const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+      source.onmessage = (message) => onEvent(JSON.parse(message.data));
+      ['status', 'phase', 'session', 'text', 'thinking', 'tool_use', 'tool_result', 'result'].forEach(type =>
+        source.addEventListener(type, (message) => onEvent(JSON.parse((message as MessageEvent).data)))
+      );
+      // The server ends the stream when the job finishes; don't let EventSource reconnect
+      source.onerror = () => source.close();
+      return () => source.close();
+    }
+  },
+
+  // Preview servers - getting one restarts it if it was evicted
+  previews: {
+    list: async (): Promise<Preview[]> => {
+      const response = await axios.get<Preview[]>(`${API_BASE_URL}/previews`);
+      return response.data;
+    },
+
+    // Previews are per workspace, which the project name and repository URL identify
+    get: async (projectName: string, url: string): Promise<Preview> => {
+      const response = await axios.get<Preview>(`${API_BASE_URL}/previews/${encodeURIComponent(projectName)}`, {
+        params: { url }
+      });
+      return response.data;
+    }
   },
 
   // Project management (uses default axios with standard timeout)
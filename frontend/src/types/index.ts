@@ -24,13 +24,55 @@ export interface ExecuteRequest {
   url: string;
   projectName: string;
   branchName: string;
-  dirPath: string;
+  dirPath?: string;  // Deprecated: the backend picks a workspace per project
   prompt: string;
   first: boolean;  // Required, not optional
+  // Optional agent budget, capped by the server's limits
+  maxTurns?: number;
+  maxSeconds?: number;
+  maxToolUses?: number;
 }
 
 export interface ExecuteResponse {
   success: boolean;
   message?: string;
   previewUrl?: string;
+  jobId?: string;
+  // An identical request already succeeded, this is its result
+  cached?: boolean;
+  commit?: string;
+  result?: Record<string, unknown>;
+}
+
+export interface Job {
+  id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  phase: string;
+  progress: number;
+  message?: string;
+  previewUrl?: string;
+  result?: Record<string, unknown>;
+  spans: { name: string; seconds: number; ok: boolean }[];
+  createdAt: number;
+  startedAt?: number;
+  finishedAt?: number;
+}
+
+export interface JobEvent {
+  jobId: string;
+  ts: number;
+  type: 'status' | 'phase' | 'session' | 'text' | 'thinking' | 'tool_use' | 'tool_result' | 'result';
+  [key: string]: unknown;
+}
+
+export interface Preview {
+  project: string;
+  path: string;
+  pid?: number;
+  port?: number;
+  url?: string;
+  running: boolean;
+  building: boolean;
+  last_access: number;
+  rss_bytes: number;
 }
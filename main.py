@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 import sys
 import uvicorn
@@ -15,31 +16,248 @@ from claude_agent_sdk import (
     query,
 )
 from textwrap import dedent
+from cc_vibecode.blocking import run_blocking, shutdown as shutdown_stages
+from cc_vibecode.budget import AgentBudget, BudgetExceeded, BudgetUsage
+from cc_vibecode.context import ContextBuilder
+from cc_vibecode.dedup import RequestCache
+from cc_vibecode.events import EventBus
 from cc_vibecode.git import CustomGitAPI
+from cc_vibecode.jobs import Job, JobQueue, QueueFullError
 from cc_vibecode.neon import CustomNeonAPI, BranchInfo
-from cc_vibecode.logger import create_logger
-from cc_vibecode.server import add_scripts_to_package_json, start_server_background, stop_server
-from fastapi import FastAPI
-from pydantic import BaseModel
+from cc_vibecode.neon_index import ProjectIndex
+from cc_vibecode.neon_ledger import BranchLedger
+from cc_vibecode.neon_pool import NeonBranchPool
+from cc_vibecode.neon_reaper import NeonReaper, ReapReport
+from cc_vibecode.npm_cache import NodeModulesCache
+from cc_vibecode.pipeline import Step, run_graph
+from cc_vibecode.previews import Preview, PreviewManager
+from cc_vibecode.logger import clip, create_logger
+from cc_vibecode.metrics import job_spans, metrics, span
+from cc_vibecode.server import add_scripts_to_package_json
+from cc_vibecode.sessions import SessionChoice, SessionStore
+from cc_vibecode.template import TemplateCache
+from cc_vibecode.workspace import WorkspaceManager
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Callable, NamedTuple
 
 logger = create_logger("agent")
 
-git = CustomGitAPI(os.getenv("GITHUB_TOKEN", ""))
-neon = CustomNeonAPI(os.getenv("NEON_API_KEY", ""))
-app = FastAPI()
+git = CustomGitAPI(
+    os.getenv("GITHUB_TOKEN", ""),
+    mirror_root=os.getenv("GIT_MIRROR_ROOT", "mirrors") or None,
+    mirror_max_age=int(os.getenv("GIT_MIRROR_MAX_AGE", "300")),
+    clone_depth=int(os.getenv("GIT_CLONE_DEPTH", "0")) or None,
+    clone_filter=os.getenv("GIT_CLONE_FILTER") or None,
+    repo_cache_ttl=int(os.getenv("GITHUB_REPO_CACHE_TTL", "3600")),
+    ready_timeout=float(os.getenv("GITHUB_READY_TIMEOUT", "60")),
+)
+neon = CustomNeonAPI(
+    os.getenv("NEON_API_KEY", ""),
+    base_url=os.getenv("NEON_API_URL"),
+    sql_roles=os.getenv("NEON_SQL_ROLES", "1") == "1",
+    projects=(
+        ProjectIndex(os.getenv("NEON_PROJECT_DB", "cache/neon_projects.db"))
+        if os.getenv("NEON_PROJECT_INDEX", "1") == "1"
+        else None
+    ),
+    ledger=(
+        BranchLedger(os.getenv("NEON_LEDGER_DB", "cache/neon_ledger.db"))
+        if os.getenv("NEON_REAPER", "1") == "1"
+        else None
+    ),
+)
+neon_pool = NeonBranchPool(
+    neon,
+    size=int(os.getenv("NEON_POOL_SIZE", "1")),
+    ttl=int(os.getenv("NEON_POOL_TTL", "3600")),
+)
+if neon_pool.size > 0:
+    neon.pool = neon_pool
+npm_cache = (
+    NodeModulesCache(os.getenv("NPM_CACHE_ROOT", "cache/node_modules"), mode=os.getenv("NPM_CACHE_MODE", "auto"))
+    if os.getenv("NPM_CACHE", "1") == "1"
+    else None
+)
+previews = PreviewManager(
+    npm_cache,
+    # Host the preview URLs returned to the browser point at
+    host=os.getenv("PREVIEW_HOST", "localhost"),
+    max_previews=int(os.getenv("PREVIEW_MAX_COUNT", "5")),
+    max_rss_bytes=int(os.getenv("PREVIEW_MAX_RSS_BYTES", str(4 * 1024**3))),
+)
+# Project snapshot injected into the system prompt, indexed once per commit
+contexts = (
+    ContextBuilder(
+        os.getenv("CONTEXT_CACHE_ROOT", "cache/context"),
+        max_chars=int(os.getenv("CONTEXT_MAX_CHARS", "6000")),
+    )
+    if os.getenv("AGENT_CONTEXT", "1") == "1"
+    else None
+)
+# Follow-up features resume the project's previous agent session
+sessions = (
+    SessionStore(
+        os.getenv("SESSION_DB", "cache/sessions.db"),
+        max_turns=int(os.getenv("SESSION_MAX_TURNS", "300")),
+        max_runs=int(os.getenv("SESSION_MAX_RUNS", "10")),
+        max_age=int(os.getenv("SESSION_MAX_AGE", str(7 * 24 * 3600))),
+    )
+    if os.getenv("AGENT_RESUME", "1") == "1"
+    else None
+)
+# Retried execute requests attach to the running job or reuse its result
+dedup = (
+    RequestCache(
+        os.getenv("REQUEST_CACHE_DB", "cache/requests.db"),
+        ttl=int(os.getenv("REQUEST_CACHE_TTL", str(24 * 3600))),
+    )
+    if os.getenv("REQUEST_DEDUP", "1") == "1"
+    else None
+)
+# Server-wide ceiling for agent runs, requests can only tighten it (0 disables a limit)
+agent_budget = AgentBudget(
+    max_turns=int(os.getenv("AGENT_MAX_TURNS", "100")) or None,
+    max_seconds=float(os.getenv("AGENT_MAX_SECONDS", "540")) or None,
+    max_tool_uses=int(os.getenv("AGENT_MAX_TOOL_USES", "300")) or None,
+)
+# New projects are copied from a local template checkout and pushed in the background
+templates = (
+    TemplateCache(
+        git,
+        os.getenv("TEMPLATE_URL", "https://github.com/shnkreddy98/init_git.git"),
+        root=os.getenv("TEMPLATE_CACHE_ROOT", "cache/template"),
+        npm_cache=npm_cache,
+        max_age=int(os.getenv("TEMPLATE_MAX_AGE", "3600")),
+    )
+    if os.getenv("TEMPLATE_LOCAL", "0") == "1"
+    else None
+)
+workspaces = WorkspaceManager(
+    git,
+    root=os.getenv("WORKSPACE_ROOT", "workspaces"),
+    reuse=os.getenv("WORKSPACE_REUSE", "1") == "1",
+    max_bytes=int(os.getenv("WORKSPACE_MAX_BYTES", str(20 * 1024**3))),
+    template=templates,
+)
+
+
+async def run_job(job: Job):
+    request = ExecuteRequest(**job.request)
+    # Spans finished anywhere in this job, including stage threads, land in job.spans
+    with job_spans() as spans:
+        job.spans = spans
+        result = await execute(
+            url=request.url,
+            proj_name=request.projectName,
+            branch_name=request.branchName,
+            prompt=request.prompt,
+            first=request.first,
+            job=job,
+            budget=agent_budget.narrowed(request.maxTurns, request.maxSeconds, request.maxToolUses),
+        )
+    job.message = str(result)
+    if isinstance(result, ResultMessage):
+        job.result = {
+            **(job.result or {}),
+            "session_id": result.session_id,
+            "num_turns": result.num_turns,
+            "duration_ms": result.duration_ms,
+            "is_error": result.is_error,
+            "total_cost_usd": result.total_cost_usd,
+        }
+        if dedup is not None and not result.is_error:
+            await run_blocking(dedup.record, job, job.result.get("commit"))
+
+
+events = EventBus(
+    buffer=int(os.getenv("EVENT_BUFFER_SIZE", "256")),
+    history=int(os.getenv("EVENT_HISTORY_SIZE", "200")),
+)
+jobs = JobQueue(
+    run_job,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    maxsize=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+    events=events,
+)
+# Deletes branches left behind by failed jobs and old default branches
+reaper = (
+    NeonReaper(
+        neon,
+        neon.ledger,
+        jobs=jobs,
+        orphan_age=int(os.getenv("NEON_REAPER_ORPHAN_AGE", "3600")),
+        retention=int(os.getenv("NEON_REAPER_RETENTION", str(7 * 24 * 3600))),
+        keep=int(os.getenv("NEON_REAPER_KEEP", "2")),
+        interval=int(os.getenv("NEON_REAPER_INTERVAL", "600")),
+        dry_run=os.getenv("NEON_REAPER_DRY_RUN", "0") == "1",
+    )
+    if neon.ledger is not None
+    else None
+)
+metrics.gauge("jobs_waiting", jobs.waiting, "Jobs queued for a worker")
+metrics.gauge("jobs_running", jobs.running, "Jobs being executed")
+metrics.gauge(
+    "previews_running",
+    lambda: sum(p.running for p in previews.all()),
+    "Preview dev servers running",
+)
+metrics.gauge(
+    "previews_rss_bytes",
+    lambda: sum(p.rss_bytes for p in previews.all()),
+    "Resident memory of all preview dev servers",
+)
+
+# Max characters of a text or tool payload forwarded to streaming clients
+EVENT_MAX_CHARS = int(os.getenv("EVENT_MAX_CHARS", "2000"))
+SSE_HEARTBEAT = 15
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await jobs.start()
+    pool_task = asyncio.create_task(neon_pool.run()) if neon.pool else None
+    previews_task = asyncio.create_task(previews.run())
+    reaper_task = asyncio.create_task(reaper.run()) if reaper else None
+    if templates is not None:
+        asyncio.create_task(run_blocking(templates.warm))
+    yield
+    await jobs.stop()
+    previews_task.cancel()
+    if reaper_task:
+        reaper_task.cancel()
+    if pool_task:
+        pool_task.cancel()
+        await run_blocking(neon_pool.drain)
+    shutdown_stages()
+
+
+app = FastAPI(lifespan=lifespan)
 
 class ExecuteRequest(BaseModel):
     url: str
     projectName: str
     branchName: str
-    dirPath: str
+    # Deprecated: every project now gets its own directory under WORKSPACE_ROOT
+    dirPath: str | None = None
     prompt: str
     first: bool
+    # Optional per-request agent budget, capped by the server's
+    maxTurns: int | None = Field(default=None, gt=0)
+    maxSeconds: float | None = Field(default=None, gt=0)
+    maxToolUses: int | None = Field(default=None, gt=0)
 
 class ExecuteResponse(BaseModel):
     success: bool
     message: str | None = None
     previewUrl: str | None = None
+    jobId: str | None = None
+    # Set when an identical request already succeeded and its result is returned
+    cached: bool = False
+    commit: str | None = None
+    result: dict[str, Any] | None = None
 
 def read(first: bool = False):
     with open("prompts.yaml", "r") as f:
@@ -54,57 +272,87 @@ def read(first: bool = False):
 def write_connection_to_env(connection: BranchInfo, env_path: str = ".env"):
     # Construct the full DATABASE_URL from individual parameters
     database_url = f"postgresql://{connection.user}:{connection.password}@{connection.host}/{connection.database}"
-
-    with open(env_path, "a+") as f:
-        # Write individual parameters
-        f.write(f"\nDATABASE={connection.database}\n")
-        f.write(f"USER={connection.user}\n")
-        f.write(f"PASSWORD={connection.password}\n")
-        f.write(f"HOST={connection.host}\n")
+    values = {
+        "DATABASE": connection.database,
+        "USER": connection.user,
+        "PASSWORD": connection.password,
+        "HOST": connection.host,
         # Also write the constructed DATABASE_URL for Prisma
-        f.write(f"DATABASE_URL={database_url}\n")
-
-
-def pre_agent_run(
-    url: str, proj_name: str, branch_name: str, dir_path: str
-) -> BranchInfo | Exception:
+        "DATABASE_URL": database_url,
+    }
+
+    # Reused workspaces keep their .env, so drop the previous run's values
+    lines = []
+    if os.path.exists(env_path):
+        with open(env_path, "r") as f:
+            lines = [
+                line for line in f.read().splitlines()
+                if line.split("=", 1)[0].strip() not in values
+            ]
+
+    with open(env_path, "w") as f:
+        for line in lines:
+            f.write(f"{line}\n")
+        for key, value in values.items():
+            f.write(f"{key}={value}\n")
+
+
+async def pre_agent_run(
+    url: str,
+    proj_name: str,
+    branch_name: str,
+    dir_path: str,
+    first: bool = False,
+    owner: str | None = None,
+) -> tuple[BranchInfo, str | None, bool]:
     # init git and neon
     # if not exists create git and neon
     # Convert to absolute path for consistency
     abs_dir_path = os.path.abspath(dir_path)
 
-    # Clean up existing directory from previous runs
-    stop_server(abs_dir_path)
-    if os.path.exists(abs_dir_path):
-        import shutil
-        shutil.rmtree(abs_dir_path)
-    os.makedirs(abs_dir_path, exist_ok=True)
-    git.ensure_github_repo(repo_url=url)
-
-    # pull branch and set env for neon
-    result = git.clone(url, destination=abs_dir_path)
-    logger.debug(f"\nClone result: {result['success']}")
-
-    if result['success']:
-        # setup neon
-        branch_info = neon.fork(project_name=proj_name, branch_name=branch_name)
-
-        if not isinstance(branch_info, Exception):
-            write_connection_to_env(branch_info, os.path.join(abs_dir_path, ".env"))
-        else:
+    def clone(_repo) -> dict:
+        # Refresh the existing checkout or clone it
+        with span("workspace.prepare"):
+            result = workspaces.prepare(url, abs_dir_path, new=local)
+        logger.debug(f"\nClone result: {result['success']}")
+        if not result["success"]:
+            raise ValueError(f"Could not clone repository, {result["stderr"]}")
+        return result
+
+    def fork() -> BranchInfo:
+        branch_info = neon.fork(project_name=proj_name, branch_name=branch_name, owner=owner)
+        if isinstance(branch_info, Exception):
             raise branch_info
-
         return branch_info
-    else:
-        raise ValueError(f"Could not clone repository, {result["stderr"]}")
-
 
-def post_agent_run(branch_info: BranchInfo, dir_path: str):
+    def write_env(_clone, branch_info: BranchInfo):
+        write_connection_to_env(branch_info, os.path.join(abs_dir_path, ".env"))
+
+    def index(_clone) -> str | None:
+        if contexts is None:
+            return None
+        with span("context.index"):
+            return contexts.summary(abs_dir_path)
+
+    # A new project built from the local template creates its remote later
+    local = first and templates is not None
+    # The clone and the Neon fork are independent until the .env is written
+    results = await run_graph([
+        Step("ensure_repo", lambda: None if local else git.ensure_github_repo(repo_url=url)),
+        Step("clone", clone, deps=["ensure_repo"]),
+        Step("fork", fork, undo=neon.release),
+        Step("write_env", write_env, deps=["clone", "fork"]),
+        Step("context", index, deps=["clone"]),
+    ])
+    return results["fork"], results["context"], bool(results["clone"].get("materialized"))
+
+
+def post_agent_run(branch_info: BranchInfo, workspace: str, dir_path: str) -> str | None:
     # Convert to absolute path for consistency
     abs_dir_path = os.path.abspath(dir_path)
 
     add_scripts_to_package_json(abs_dir_path)
-    start_server_background(abs_dir_path)
+    preview = previews.start(workspace, abs_dir_path)
     # delete neon
     try:
         neon.promote(
@@ -115,93 +363,421 @@ def post_agent_run(branch_info: BranchInfo, dir_path: str):
         )
     except Exception as e:
         raise e
+
+    return preview.url
     
 
 
-async def agent_run(dir_path: str, prompt: str, first: bool = False):
+class AgentRun(NamedTuple):
+    result: ResultMessage | None
+    tool_uses: int
+    # The session that was resumed, None for a fresh one
+    session: SessionChoice | None
+
+
+def _session_mode(session: SessionChoice | None) -> str:
+    if session is None:
+        return "new"
+    return "forked" if session.fork else "resumed"
+
+
+def _clip(value: Any) -> str:
+    return str(clip(value, EVENT_MAX_CHARS))
+
+
+async def agent_run(
+    dir_path: str,
+    prompt: str,
+    first: bool = False,
+    on_event: Callable[[dict[str, Any]], None] | None = None,
+    project_context: str | None = None,
+    session: SessionChoice | None = None,
+    usage: BudgetUsage | None = None,
+) -> AgentRun:
+    def emit(event: dict[str, Any]):
+        if on_event is not None:
+            on_event(event)
+
     if first:
         system_prompt = read(first)
         first = False
     else:
         system_prompt = read(first)
+    if project_context:
+        # Saves the agent the turns it would spend listing and reading files
+        system_prompt += (
+            "\n\n## Project snapshot\n"
+            "Use this map of the project instead of exploring it; read a file only "
+            "when you need its contents.\n\n" + project_context
+        )
     # run agent
     messages_count: int = 0
     tool_uses_count: int = 0
     result = None  # Initialize result to avoid UnboundLocalError
+    usage = usage or BudgetUsage(budget=AgentBudget())
+    usage.start()
     options = ClaudeAgentOptions(
-        system_prompt=system_prompt, permission_mode="bypassPermissions", cwd=dir_path
+        system_prompt=system_prompt,
+        permission_mode="bypassPermissions",
+        cwd=dir_path,
+        resume=session.session_id if session else None,
+        # A new feature branches off the previous session instead of extending it
+        fork_session=bool(session and session.fork),
+        # The CLI ends the run itself with an error_max_turns result
+        max_turns=usage.budget.max_turns,
     )
-
-    async for message in query(prompt=prompt, options=options):
-        if isinstance(message, AssistantMessage):
-            messages_count += 1
-            for block in message.content:
-                if isinstance(block, TextBlock):
-                    logger.info(f" Claude: {block.text}...")
-                    # Check for API errors in the text block
-                    if "API Error" in block.text or "api error" in block.text.lower():
-                        error_message = block.text
-                        logger.error(f"API Response Error: {error_message}")
-                elif isinstance(block, ThinkingBlock):
-                    logger.info(f"Thinking: {block.thinking}...")
-                elif isinstance(block, ToolUseBlock):
-                    tool_uses_count += 1
-                    logger.info(f"Tool: {block.name} Input: {block.input}")
-                elif isinstance(block, ToolResultBlock):
-                    if block.is_error:
-                        logger.error("Tool error occurred")
-                    logger.info(
-                        f"Tool Result Id: {block.tool_use_id}, Content: {block.content}"
-                    )
-        elif isinstance(message, ResultMessage):
-            result = message
-            logger.info("Received result message")
-        logger.info(message)
-    return result
+    mode = _session_mode(session)
+    metrics.inc("agent_sessions_total", mode=mode)
+    emit({"type": "session", "mode": mode, "resume": session.session_id if session else None})
+
+    async def consume(messages):
+        nonlocal messages_count, tool_uses_count, result
+        async for message in messages:
+            if isinstance(message, AssistantMessage):
+                messages_count += 1
+                usage.turns += 1
+                for block in message.content:
+                    if isinstance(block, TextBlock):
+                        logger.info("Claude: %s", clip(block.text))
+                        emit({"type": "text", "text": _clip(block.text)})
+                        # Check for API errors in the text block
+                        if "API Error" in block.text or "api error" in block.text.lower():
+                            logger.error("API Response Error: %s", clip(block.text))
+                    elif isinstance(block, ThinkingBlock):
+                        logger.debug("Thinking: %s", clip(block.thinking))
+                        emit({"type": "thinking", "text": _clip(block.thinking)})
+                    elif isinstance(block, ToolUseBlock):
+                        tool_uses_count += 1
+                        usage.tool_uses += 1
+                        logger.info("Tool: %s Input: %s", block.name, clip(block.input))
+                        emit(
+                            {
+                                "type": "tool_use",
+                                "id": block.id,
+                                "name": block.name,
+                                "input": _clip(block.input),
+                            }
+                        )
+                    elif isinstance(block, ToolResultBlock):
+                        if block.is_error:
+                            logger.error("Tool error occurred")
+                        logger.debug(
+                            "Tool Result Id: %s, Content: %s", block.tool_use_id, clip(block.content)
+                        )
+                        emit(
+                            {
+                                "type": "tool_result",
+                                "id": block.tool_use_id,
+                                "isError": bool(block.is_error),
+                                "content": _clip(block.content),
+                            }
+                        )
+            elif isinstance(message, ResultMessage):
+                result = message
+                usage.turns = message.num_turns
+                logger.info("Received result message")
+                with_context = "on" if project_context else "off"
+                logger.info(
+                    f"Agent finished in {message.num_turns} turns with {tool_uses_count} "
+                    f"tool calls (context {with_context})"
+                )
+                metrics.inc("agent_runs_total", context=with_context)
+                metrics.inc("agent_turns_total", message.num_turns, context=with_context)
+                metrics.inc("agent_tool_uses_total", tool_uses_count, context=with_context)
+                if message.total_cost_usd:
+                    metrics.inc("agent_cost_usd_total", message.total_cost_usd)
+                emit(
+                    {
+                        "type": "result",
+                        "isError": message.is_error,
+                        "numTurns": message.num_turns,
+                        "toolUses": tool_uses_count,
+                        "totalCostUsd": message.total_cost_usd,
+                    }
+                )
+            logger.debug("%s", clip(message))
+            if usage.over_tool_uses():
+                usage.exceeded = "tool_uses"
+                return
+
+    messages = query(prompt=prompt, options=options)
+    error = None
+    try:
+        async with asyncio.timeout(usage.remaining()) as deadline:
+            await consume(messages)
+    except TimeoutError:
+        if not deadline.expired():
+            raise
+        usage.exceeded = "seconds"
+    except Exception as e:
+        # The CLI exits non-zero after an error_max_turns result
+        if result is None or result.subtype != "error_max_turns":
+            if session is None or messages_count:
+                raise
+            error = e
+    finally:
+        # Stops the CLI when the run was cut short
+        await messages.aclose()
+        usage.tick()
+
+    if result is not None and result.subtype == "error_max_turns":
+        usage.exceeded = "turns"
+    if usage.exceeded:
+        logger.error(f"Agent over budget: {usage.model_dump()}")
+        metrics.inc("agent_budget_exceeded_total", limit=usage.exceeded)
+        raise BudgetExceeded(usage)
+
+    if error is None and not messages_count and (result is None or result.is_error):
+        error = result
+    if session is not None and error is not None:
+        # The transcript may be gone (another machine, cleaned up); start over
+        logger.error(f"Could not resume session {session.session_id}: {clip(error)}")
+        return await agent_run(dir_path, prompt, first, on_event, project_context, usage=usage)
+    return AgentRun(result, tool_uses_count, session)
 
 
 @app.post("/api/execute")
 async def execute_endpoint(request: ExecuteRequest) -> ExecuteResponse:
-    try:
-        result = await execute(
-            url=request.url,
-            proj_name=request.projectName,
-            branch_name=request.branchName,
-            dir_path=request.dirPath,
-            prompt=request.prompt,
-            first=request.first
-        )
+    key = head = None
+    if dedup is not None:
+        key = dedup.key(request.url, request.branchName, request.prompt, request.first)
+        job = dedup.attach(key)
+        if job is None:
+            head = await run_blocking(git.remote_head, request.url)
+            cached = await run_blocking(dedup.lookup, key, head)
+            if cached is not None:
+                logger.info(f"Returning cached result of job {cached.job_id}")
+                metrics.inc("execute_deduplicated_total", outcome="cached")
+                # The preview may have moved to another port since
+                running = {p.project: p.url for p in await run_blocking(previews.all) if p.url}
+                return ExecuteResponse(
+                    success=True,
+                    message=cached.message,
+                    previewUrl=running.get(
+                        workspaces.key(request.projectName, request.url), cached.previewUrl
+                    ),
+                    cached=True,
+                    commit=cached.commit,
+                    result=cached.result,
+                )
+            # An identical request may have been queued while we asked the remote
+            job = dedup.attach(key)
+        if job is not None:
+            logger.info(f"Attaching duplicate request to job {job.id}")
+            metrics.inc("execute_deduplicated_total", outcome="attached")
+            return ExecuteResponse(
+                success=True,
+                message=f"Job {job.id} already running",
+                jobId=job.id,
+            )
 
-        # Return success response with result details
-        return ExecuteResponse(
-            success=True,
-            message=str(result),
-            previewUrl="http://localhost:3000"
-        )
-    except Exception as e:
+    try:
+        job = jobs.submit(request.model_dump())
+    except QueueFullError as e:
         logger.error(f"Execute endpoint error: {str(e)}")
-        return ExecuteResponse(
-            success=False,
-            message=str(e),
-            previewUrl=None
-        ) 
-
-async def execute(url: str, proj_name: str, branch_name: str, dir_path: str, prompt: str, first: bool = False) -> ResultMessage:
-    # Convert to absolute path once at the beginning
-    abs_dir_path = os.path.abspath(dir_path)
+        raise HTTPException(status_code=503, detail=str(e))
+    if dedup is not None and key is not None:
+        dedup.track(key, head, job)
+
+    return ExecuteResponse(
+        success=True,
+        message=f"Job {job.id} queued",
+        jobId=job.id,
+    )
 
-    # Pre-Agent Run
-    branch_info = pre_agent_run(url, proj_name, branch_name, abs_dir_path)
 
-    # Run
-    result = await agent_run(abs_dir_path, prompt, first)
-    logger.info("===" * 60)
-    logger.info(result)
-    logger.info("===" * 60)
+@app.get("/api/previews")
+async def previews_endpoint() -> list[Preview]:
+    return await run_blocking(previews.all)
 
-    # Post-Agent Run
-    if isinstance(branch_info, BranchInfo):
-        post_agent_run(branch_info, abs_dir_path)
+
+@app.get("/api/previews/{project_name}")
+async def preview_endpoint(project_name: str, url: str) -> Preview:
+    # Restarts the preview if it was evicted to save memory, unless a job owns the workspace
+    try:
+        workspace = workspaces.key(project_name, url)
+    except ValueError:
+        # No workspace can have that name
+        raise HTTPException(status_code=404, detail=f"No preview for {project_name}")
+    lock = workspaces.lock(workspace)
+    if lock.locked():
+        preview = await run_blocking(previews.get, workspace, False)
+    else:
+        async with lock:
+            preview = await run_blocking(previews.get, workspace)
+    if preview is None:
+        raise HTTPException(status_code=404, detail=f"No preview for {project_name}")
+    return preview
+
+
+@app.get("/api/jobs/{job_id}")
+async def job_endpoint(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job_endpoint(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.done:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status.value}")
+    # The worker stops the agent and releases the job's Neon branch
+    return jobs.cancel(job_id)
+
+
+@app.get("/api/neon/reaper")
+async def reaper_endpoint() -> ReapReport:
+    if reaper is None:
+        raise HTTPException(status_code=404, detail="Reaper disabled")
+    if reaper.last is None:
+        raise HTTPException(status_code=404, detail="Reaper has not run yet")
+    return reaper.last
+
+
+@app.post("/api/neon/reaper/run")
+async def reaper_run_endpoint(dryRun: bool | None = None) -> ReapReport:
+    if reaper is None:
+        raise HTTPException(status_code=404, detail="Reaper disabled")
+    return await run_blocking(reaper.sweep, dryRun)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> str:
+    # Gauges read /proc for preview memory, keep that off the event loop
+    return await run_blocking(metrics.render)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events_endpoint(job_id: str) -> StreamingResponse:
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def stream():
+        subscription = events.subscribe(job_id)
+        pending = None
+        try:
+            while True:
+                pending = pending or asyncio.ensure_future(anext(subscription))
+                done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT)
+                if not done:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                try:
+                    event = pending.result()
+                except StopAsyncIteration:
+                    return
+                pending = None
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+            await subscription.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def execute(url: str, proj_name: str, branch_name: str, prompt: str, first: bool = False, job: Job | None = None, dir_path: str | None = None, budget: AgentBudget | None = None) -> ResultMessage:
+    # Each project builds in its own workspace unless a directory is given explicitly
+    workspace = workspaces.key(proj_name, url)
+    abs_dir_path = os.path.abspath(dir_path or workspaces.path_for(workspace))
+
+    async with workspaces.lock(workspace):
+        # Keep the old preview down while the workspace is rebuilt
+        await run_blocking(previews.hold, workspace)
+        try:
+            # Pre-Agent Run
+            if job:
+                job.report("pre_agent", 0.1)
+            with span("pre_agent"):
+                branch_info, project_context, materialized = await pre_agent_run(
+                    url, proj_name, branch_name, abs_dir_path, first, job.id if job else None
+                )
+            # Create the remote and push the template while the agent works
+            publish = (
+                asyncio.ensure_future(run_blocking(templates.publish, url, abs_dir_path))
+                if templates is not None and materialized
+                else None
+            )
+
+            # Run
+            if job:
+                job.report("agent", 0.3)
+            session = None
+            if sessions is not None:
+                if first:
+                    # A new project starts a new conversation
+                    await run_blocking(sessions.forget, workspace)
+                else:
+                    session = await run_blocking(sessions.pick, workspace, branch_name)
+            usage = BudgetUsage(budget=budget or agent_budget)
+            try:
+                with span("agent"):
+                    run = await agent_run(
+                        abs_dir_path,
+                        prompt,
+                        first,
+                        on_event=job.emit if job else None,
+                        project_context=project_context,
+                        session=session,
+                        usage=usage,
+                    )
+                if publish is not None:
+                    published = await publish
+                    if not published["success"]:
+                        raise ValueError(f"Could not push new project to {url}, {published['stderr']}")
+                    # The agent's own push fails if it ran before the remote existed
+                    await run_blocking(
+                        git.run_git_command, ["git", "push", "-q", "origin", "HEAD:main"], abs_dir_path
+                    )
+            except BaseException:
+                if publish is not None and not publish.done():
+                    # Nobody awaits it anymore; the push itself finishes in its thread
+                    publish.cancel()
+                # Cancelled, over budget or failed: the fork will not be promoted
+                if isinstance(branch_info, BranchInfo):
+                    await run_blocking(neon.release, branch_info)
+                raise
+            finally:
+                if job:
+                    job.result = {"budget": usage.model_dump()}
+            result = run.result
+            logger.info("Agent result: %s", clip(result))
+            commit = await run_blocking(
+                git.run_git_command, ["git", "rev-parse", "HEAD"], abs_dir_path
+            )
+            if sessions is not None and isinstance(result, ResultMessage) and not result.is_error:
+                await run_blocking(sessions.record, workspace, branch_name, result, run.session)
+            if job:
+                job.result = {
+                    **(job.result or {}),
+                    "tool_uses": run.tool_uses,
+                    "context_chars": len(project_context or ""),
+                    "session": _session_mode(run.session),
+                    "commit": commit["stdout"].strip() if commit["success"] else None,
+                }
+
+            # Post-Agent Run
+            if job:
+                job.report("post_agent", 0.8)
+            if isinstance(branch_info, BranchInfo):
+                with span("post_agent"):
+                    preview_url = await run_blocking(
+                        post_agent_run, branch_info, workspace, abs_dir_path
+                    )
+                if job:
+                    job.previewUrl = preview_url
+        finally:
+            previews.release(workspace)
 
     return result
 
@@ -236,7 +812,7 @@ def test():
         GIT_URL = "git@github.com:shnkreddy98"
         github_url = f"{GIT_URL}/{repo}.git"
         prompt = input("What is up?\n> ")
-        asyncio.run(execute(github_url, proj_name, branch_name, dir_path, prompt, first))
+        asyncio.run(execute(github_url, proj_name, branch_name, prompt, first, dir_path=dir_path))
 
 if __name__ == "__main__":
     uvicorn.run(app=app, port=8080)
\ No newline at end of file